@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+from main.apps.tablebuilder.constants import APP_NAME
+
+
+def _warm_tables_on_request(sender, **kwargs):
+    from main.apps.tablebuilder.helpers import warm_tables
+
+    warm_tables()
+
+
+class TableBuilderConfig(AppConfig):
+    name = "main.apps.tablebuilder"
+    label = APP_NAME
+
+    def ready(self):
+        # "eager" warms when the WSGI/ASGI application is loaded (see main/wsgi.py), the first
+        # request is the fallback for servers that did not go through it. "lazy" only warms on
+        # the first request and "off" leaves it to the `warm_tables` command.
+        if settings.TABLEBUILDER_STARTUP_MODE in ("eager", "lazy"):
+            request_started.connect(
+                _warm_tables_on_request, dispatch_uid="tablebuilder_warm_tables"
+            )
@@ -0,0 +1,90 @@
+"""Cold-row archival of dynamic tables.
+
+The rows matching a table's `ArchivalPolicy` are moved, in batches of consecutive primary keys,
+to gzip JSON lines files under `TABLEBUILDER_ARCHIVE_DIR/<table structure id>/`, one
+`ArchiveChunk` per batch. Each batch is written and synced to disk before its rows are deleted
+from the table in the same transaction as the chunk record, under the schema lock of the table.
+Archived rows are read back, projected on the current fields, by `read_archived_rows`.
+"""
+import gzip
+import json
+import os
+import shutil
+
+from django.conf import settings
+from django.db import transaction
+
+from main.apps.tablebuilder.constants import SCHEMA_CHANGED_EXCEPTION_MESSAGE
+from main.apps.tablebuilder.exceptions import TableLockedException
+from main.apps.tablebuilder.locks import table_schema_lock
+from main.apps.tablebuilder.models import ArchiveChunk, TableStructure
+
+
+def _absolute_path(path):
+    return os.path.join(settings.TABLEBUILDER_ARCHIVE_DIR, path)
+
+
+def _write_chunk(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as file:
+            for row in rows:
+                file.write(json.dumps(row, default=str).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_rows(table_structure, model, filters, batch_size):
+    """
+    Move the rows of `model` matching `filters` to chunk files of up to `batch_size` rows.
+
+    :return: (number of written chunks, number of archived rows)
+    """
+    names = [field.attname for field in model._meta.concrete_fields]
+    rows = model.objects.filter(**filters).order_by("pk")
+    fingerprint = table_structure.fingerprint
+    chunks = archived = 0
+    last = None
+    while True:
+        with transaction.atomic(), table_schema_lock(table_structure.pk):
+            if not TableStructure.objects.filter(
+                pk=table_structure.pk, fingerprint=fingerprint
+            ).exists():
+                raise TableLockedException(SCHEMA_CHANGED_EXCEPTION_MESSAGE)
+            batch = rows if last is None else rows.filter(pk__gt=last)
+            values = list(batch.values(*names)[:batch_size])
+            if not values:
+                return chunks, archived
+            chunk = ArchiveChunk(
+                table_structure=table_structure, rows=len(values), fingerprint=fingerprint
+            )
+            chunk.path = os.path.join(str(table_structure.pk), f"{chunk.id}.jsonl.gz")
+            path = _absolute_path(chunk.path)
+            _write_chunk(path, values)
+            try:
+                chunk.save()
+                model.objects.filter(pk__in=[row["id"] for row in values]).delete()
+            except Exception:
+                os.remove(path)
+                raise
+        chunks += 1
+        archived += len(values)
+        last = values[-1]["id"]
+
+
+def read_archived_rows(table_structure, field_names):
+    """
+    :param field_names: current fields of the table, missing from rows archived before they
+        were added (None)
+    :return: an iterator over the archived rows, oldest chunk first, in the serializer layout
+    """
+    for chunk in table_structure.archive_chunks.order_by("created", "id"):
+        with gzip.open(_absolute_path(chunk.path), "rt") as file:
+            for line in file:
+                row = json.loads(line)
+                yield {"id": row["id"], **{name: row.get(name) for name in field_names}}
+
+
+def delete_archive(table_structure_id):
+    """Remove the chunk files of a table, their records are deleted with the table structure"""
+    shutil.rmtree(_absolute_path(str(table_structure_id)), ignore_errors=True)
@@ -0,0 +1,133 @@
+"""Helpers shared by the tablebuilder benchmark and load commands"""
+import json
+import math
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values` (pct in 0-100).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """
+    :param latencies: request latencies in seconds
+    :param elapsed: wall clock seconds for the whole run
+    :return: a dict with throughput and latency percentiles in milliseconds
+    """
+
+    def to_ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "max_ms": to_ms(max(latencies) if latencies else None),
+    }
+
+
+def http_request(url, method="GET", payload=None, read_delay=0.0, read_size=16384, timeout=60):
+    """
+    Issue one request and read the whole body.
+
+    `read_delay` sleeps between reads of `read_size` bytes to emulate a slow client.
+
+    :return: (status code or None on connection errors, elapsed seconds)
+    """
+    data = None
+    headers = {"Accept": "application/json"}
+    if payload is not None:
+        data = json.dumps(payload).encode()
+        headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(url, data=data, method=method, headers=headers)
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+            while response.read(read_size):
+                if read_delay:
+                    time.sleep(read_delay)
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except OSError:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited early: {' '.join(process.args)}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on port {port}.")
+
+
+@contextmanager
+def run_server(kind, workers):
+    """
+    Serve the project with gunicorn (`kind="wsgi"`) or uvicorn (`kind="asgi"`) on a free port
+    and stop the server on exit.
+
+    :return: the base URL of the server once it accepts connections
+    """
+    port = free_port()
+    root = str(settings.BASE_DIR)
+    if kind == "wsgi":
+        args = ["gunicorn", "main.wsgi:application", "--chdir", root]
+        args += ["--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+    else:
+        args = ["uvicorn", "main.asgi:application", "--app-dir", root, "--no-access-log"]
+        args += ["--workers", str(workers), "--port", str(port)]
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port, process)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def save_table_serializer(serializer):
+    """
+    Save a validated `TableStructureSerializer`.
+    """
+    if connection.vendor == "sqlite":
+        # SQLite cannot disable foreign key checks inside the serializers' atomic blocks and
+        # every schema editor turns them back on when it exits
+        connection.disable_constraint_checking()
+    return serializer.save()
@@ -0,0 +1,171 @@
+"""Row change log of dynamic tables.
+
+Triggers on the dynamic table append a `RowChange` for every inserted, updated or deleted row,
+so consumers (incremental summaries, the change feed) can process only what changed since the
+last sequence number they saw. The triggers are installed only for tables that need the log,
+and the log is trimmed by the `compact_row_changes` command.
+"""
+from django.db import connection, models, transaction
+from django.db.backends.utils import truncate_name
+
+from main.apps.tablebuilder.instrumentation import timed
+from main.apps.tablebuilder.models import RowChange
+
+PG_LOG_FUNCTION = "tablebuilder_log_row_change"
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _trigger_name(db_table, suffix):
+    return truncate_name(f"{db_table}_changes{suffix}", connection.ops.max_name_length())
+
+
+def change_log_enabled(table_structure):
+    """
+    The log is kept while the change feed is on or any summary is refreshed from it.
+    """
+    return table_structure.change_feed or table_structure.summaries.exists()
+
+
+def db_table_structure_id(pk):
+    """
+    :return: `pk` as stored in `RowChange.table_structure_id` (hex string on SQLite)
+    """
+    return RowChange._meta.get_field("table_structure").get_db_prep_value(pk, connection)
+
+
+@timed("schema_editor")
+def install_change_log(model, table_structure):
+    """
+    (Re)install the change log triggers on the table of `model`, idempotent.
+    """
+    db_table = _qn(model._meta.db_table)
+    log_table = _qn(RowChange._meta.db_table)
+    table_structure_id = db_table_structure_id(table_structure.pk)
+    columns = "table_structure_id, row_id, operation, created"
+    with connection.cursor() as cursor:
+        _drop_triggers(cursor, model._meta.db_table)
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE OR REPLACE FUNCTION {PG_LOG_FUNCTION}() RETURNS trigger AS $$ "
+                "BEGIN "
+                "IF TG_OP = 'DELETE' THEN "
+                f"INSERT INTO {log_table} ({columns}) "
+                "VALUES (TG_ARGV[0]::uuid, OLD.id, 'D', now()); RETURN OLD; "
+                "END IF; "
+                f"INSERT INTO {log_table} ({columns}) "
+                "VALUES (TG_ARGV[0]::uuid, NEW.id, left(TG_OP, 1), now()); RETURN NEW; "
+                "END $$ LANGUAGE plpgsql"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {_qn(_trigger_name(model._meta.db_table, ''))} "
+                f"AFTER INSERT OR UPDATE OR DELETE ON {db_table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {PG_LOG_FUNCTION}('{table_structure_id}')"
+            )
+        else:
+            # SQLite drops the triggers whenever Django rebuilds the table on ALTER, see
+            # `install_change_log` calls after schema updates
+            for suffix, event, row in (
+                ("_ai", "INSERT", "new"),
+                ("_au", "UPDATE", "new"),
+                ("_ad", "DELETE", "old"),
+            ):
+                cursor.execute(
+                    f"CREATE TRIGGER {_qn(_trigger_name(model._meta.db_table, suffix))} "
+                    f"AFTER {event} ON {db_table} BEGIN "
+                    f"INSERT INTO {log_table} ({columns}) "
+                    f"VALUES ('{table_structure_id}', {row}.id, '{event[0]}', CURRENT_TIMESTAMP); "
+                    "END"
+                )
+
+
+@timed("schema_editor")
+def remove_change_log(model):
+    with connection.cursor() as cursor:
+        _drop_triggers(cursor, model._meta.db_table)
+
+
+def _drop_triggers(cursor, db_table):
+    if connection.vendor == "postgresql":
+        cursor.execute(
+            f"DROP TRIGGER IF EXISTS {_qn(_trigger_name(db_table, ''))} ON {_qn(db_table)}"
+        )
+    else:
+        for suffix in ("_ai", "_au", "_ad"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {_qn(_trigger_name(db_table, suffix))}")
+
+
+def committed_seq(model, table_structure):
+    """
+    :return: the sequence up to which every change of `table_structure` is committed. On
+    PostgreSQL seq is assigned at insert, not in commit order: the SHARE lock waits for the
+    in-flight writes to the table so none of them commits below the returned seq later on.
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {_qn(model._meta.db_table)} IN SHARE MODE")
+        changes = RowChange.objects.filter(table_structure_id=table_structure.pk)
+        return changes.aggregate(seq=models.Max("seq"))["seq"] or 0
+
+
+def changes_page(table_structure, since, limit, upto=None):
+    """
+    :return: a queryset of the first `limit` + 1 changes after `since` (up to `upto`)
+    """
+    changes = RowChange.objects.filter(table_structure_id=table_structure.pk, seq__gt=since)
+    if upto is not None:
+        changes = changes.filter(seq__lte=upto)
+    return changes.order_by("seq")[: limit + 1]
+
+
+def read_changes(model, table_structure, since, limit):
+    """
+    :return: (up to `limit` committed changes after `since` in sequence order, whether there are
+    more). Inserted and updated rows carry their current values, deleted rows None.
+    """
+    changes = list(
+        changes_page(table_structure, since, limit, upto=committed_seq(model, table_structure))
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    rows = model.objects.in_bulk(
+        set(change.row_id for change in changes if change.operation != RowChange.DELETE)
+    )
+    return [(change, rows.get(change.row_id)) for change in changes], has_more
+
+
+def compact_changes(table_structure, before, batch_size):
+    """
+    Delete the changes of `table_structure` that no consumer needs anymore: the ones older than
+    `before` (all of them when the change feed is off) that every summary has already folded in.
+
+    :return: number of deleted changes
+    """
+    changes = RowChange.objects.filter(table_structure_id=table_structure.pk)
+    if table_structure.change_feed:
+        changes = changes.filter(created__lt=before)
+    summaries_seq = [
+        seq
+        for seq in table_structure.summaries.values_list("refreshed_seq", flat=True)
+        # A summary waiting for a full rebuild doesn't need the log
+        if seq is not None
+    ]
+    if summaries_seq:
+        changes = changes.filter(seq__lte=min(summaries_seq))
+    upto = changes.aggregate(seq=models.Max("seq"))["seq"]
+    if upto is None:
+        return 0
+
+    deleted = 0
+    while True:
+        batch = list(changes.filter(seq__lte=upto).values_list("seq", flat=True)[:batch_size])
+        if not batch:
+            break
+        deleted += RowChange.objects.filter(seq__in=batch).delete()[0]
+    if upto > table_structure.changes_compacted_seq:
+        table_structure.changes_compacted_seq = upto
+        table_structure.save(update_fields=["changes_compacted_seq", "modified"])
+    return deleted
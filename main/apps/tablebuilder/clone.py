@@ -0,0 +1,56 @@
+"""Server-side copies of dynamic tables.
+
+Rows are copied with `INSERT INTO ... SELECT` in batches of consecutive primary keys, so no row
+crosses into Python: each batch reads only its upper key bound. Every batch runs in its own
+transaction under the schema lock of the source table and stops the copy if the source schema
+changed since the clone was created.
+"""
+from django.db import connection, transaction
+
+from main.apps.tablebuilder.constants import SCHEMA_CHANGED_EXCEPTION_MESSAGE
+from main.apps.tablebuilder.exceptions import TableLockedException
+from main.apps.tablebuilder.locks import table_schema_lock
+from main.apps.tablebuilder.models import TableStructure
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def copy_rows(table_structure, source_model, target_model, filters, batch_size):
+    """
+    Copy the rows of `source_model` matching the equality `filters` to `target_model`, which
+    must have the same fields.
+
+    :return: number of copied rows
+    """
+    fields = source_model._meta.concrete_fields
+    insert = (
+        f"INSERT INTO {_qn(target_model._meta.db_table)} "
+        f"({', '.join(_qn(field.column) for field in fields)}) "
+    )
+    rows = source_model.objects.filter(**filters).order_by("pk")
+    fingerprint = table_structure.fingerprint
+    copied = 0
+    last = None
+    while True:
+        with transaction.atomic(), table_schema_lock(table_structure.pk):
+            if not TableStructure.objects.filter(
+                pk=table_structure.pk, fingerprint=fingerprint
+            ).exists():
+                raise TableLockedException(SCHEMA_CHANGED_EXCEPTION_MESSAGE)
+            batch = rows if last is None else rows.filter(pk__gt=last)
+            bound = list(batch.values_list("pk", flat=True)[batch_size - 1 : batch_size])
+            if bound:
+                batch = batch.filter(pk__lte=bound[0])
+            sql, params = (
+                batch.order_by()
+                .values_list(*(field.attname for field in fields))
+                .query.sql_with_params()
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(insert + sql, params)
+                copied += cursor.rowcount
+        if not bound:
+            return copied
+        last = bound[0]
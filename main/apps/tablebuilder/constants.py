@@ -10,3 +10,42 @@ ACCEPTABLE_STRING_TYPES = [CHAR_STRING_TYPE, TEXT_STRING_TYPE]
 
 GENERATE_TABLE_EXCEPTION_MESSAGE = "Something went wrong. Deleting table structure from db."
 TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE = "Table Already Exists."
+FULL_TEXT_SEARCH_NOT_ENABLED_EXCEPTION_MESSAGE = "Full-text search is not enabled for this table."
+INVALID_SEARCH_FIELD_EXCEPTION_MESSAGE = "is not a string field of this table."
+INVALID_SUMMARY_FIELD_EXCEPTION_MESSAGE = "is not a field of this table."
+INVALID_FILTER_FIELD_EXCEPTION_MESSAGE = "is not a field of this table."
+INVALID_FILTER_LOOKUP_EXCEPTION_MESSAGE = "is not a supported lookup."
+SCHEMA_CHANGED_EXCEPTION_MESSAGE = "The schema of the table changed during the operation, retry."
+INVALID_AGGREGATE_FIELD_EXCEPTION_MESSAGE = "is not a number field of this table."
+SUMMARY_ALREADY_EXISTS_EXCEPTION_MESSAGE = "Summary Already Exists."
+CHANGE_FEED_NOT_ENABLED_EXCEPTION_MESSAGE = "The change feed is not enabled for this table."
+CHANGES_COMPACTED_EXCEPTION_MESSAGE = (
+    "Changes since this sequence were compacted, re-read the table and resume from `last_seq`."
+)
+
+ASYNC_ROWS_CHUNK_SIZE = 2000
+
+# Bump when the layout of the compiled schema snapshot changes
+SCHEMA_SNAPSHOT_VERSION = 1
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+SUMMARY_FUNCTIONS = ["sum", "min", "max"]
+
+CHANGES_DEFAULT_LIMIT = 100
+CHANGES_MAX_LIMIT = 1000
+
+# Compiled row validators kept in memory, one per table schema version
+ROW_VALIDATOR_CACHE_SIZE = 512
+
+# Rows copied per INSERT ... SELECT by the clone action
+CLONE_BATCH_SIZE = 10000
+
+# Rows deleted per transaction when emptying a dropped table in the background (SQLite)
+TEARDOWN_BATCH_SIZE = 10000
+
+# Lookups allowed in archival policy filters, and rows moved per archive chunk
+ARCHIVE_FILTER_LOOKUPS = ["exact", "lt", "lte", "gt", "gte"]
+ARCHIVE_BATCH_SIZE = 10000
@@ -1,3 +1,5 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.serializers import ValidationError
 
 
@@ -15,3 +17,17 @@ class GenerateTableException(TableBuilderSerializerException):
 
 class TableColumnAlreadyExistsException(TableBuilderSerializerException):
     pass
+
+
+class FullTextSearchNotEnabledException(TableBuilderSerializerException):
+    pass
+
+
+class ChangeFeedNotEnabledException(TableBuilderSerializerException):
+    pass
+
+
+class TableLockedException(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Another schema change of this table is in progress, retry later."
+    default_code = "table_locked"
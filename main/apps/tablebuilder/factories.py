@@ -4,7 +4,7 @@ from factory.django import DjangoModelFactory
 
 from main.apps.tablebuilder.helpers import sequence
 
-from .models import TableStructure, FieldDefinition
+from .models import DbJobProcess, TableStructure, FieldDefinition
 
 
 class TableStructureFactory(DjangoModelFactory):
@@ -34,3 +34,38 @@ class DbJobProcessFactory(DjangoModelFactory):
     type = FuzzyText()
     name = FuzzyText()
     status = FuzzyInteger(0, 1)
+
+    class Meta:
+        model = DbJobProcess
+
+
+FIELD_TYPES = ["string", "number", "boolean"]
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india"]
+
+
+def fake_field_definitions(rng, count):
+    """
+    :param rng: a `random.Random`, seed it for deterministic output
+    :param count: number of fields
+    :return: field definitions with random types
+    """
+    return [{"name": f"field_{i}", "type": rng.choice(FIELD_TYPES)} for i in range(count)]
+
+
+def fake_row(rng, field_definitions):
+    """
+    :param rng: a `random.Random`, seed it for deterministic output
+    :param field_definitions: field definitions of the table
+    :return: a dict with random values matching the field types
+    """
+    values = {}
+    for field_definition in field_definitions:
+        field_type = field_definition["type"]
+        if field_type == "string":
+            value = f"{rng.choice(WORDS)}-{rng.randrange(100000)}"
+        elif field_type == "number":
+            value = rng.randrange(-(2**31), 2**31)
+        else:
+            value = rng.random() < 0.5
+        values[field_definition["name"]] = value
+    return values
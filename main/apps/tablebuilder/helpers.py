@@ -1,14 +1,25 @@
 """Helpers used across project tablebuilder"""
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from importlib import reload
+import json
 import sys
+import threading
 import uuid
 
 from django.apps import apps
-from django.core.exceptions import FieldDoesNotExist
-from django.db import connection, models
+from django.conf import settings
+from django.db import connection, connections, models
 
 from main.apps.tablebuilder.constants import APP_NAME, TABLE_FIELD_DEFAULT_STRING_LENGTH
-from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.instrumentation import record_registry_lookup, timed
+from main.apps.tablebuilder.metrics import (
+    SCHEMA_CHANGES,
+    STARTUP_REGISTRATION,
+    update_registered_models,
+)
+from main.apps.tablebuilder.snapshot import build_schema, load_schema
 
 
 def _get_field_class(
@@ -29,6 +40,15 @@ def _get_field_class(
     return field_class
 
 
+def schema_fingerprint(field_definitions):
+    """
+    Canonical fingerprint of a table's field set: independent of the field order, ids and
+    `old_name`s of the submitted definitions.
+    """
+    fields = sorted([field.get("name"), field.get("type")] for field in field_definitions)
+    return hashlib.sha256(json.dumps(fields, separators=(",", ":")).encode()).hexdigest()
+
+
 def create_dynamic_model(name, field_definitions=None, app_label="", module="", options=None):
     """
     Dynamically create a new model and its corresponding database table.
@@ -46,7 +66,7 @@ def create_dynamic_model(name, field_definitions=None, app_label="", module="",
         for key, value in options.items():
             setattr(Meta, key, value)
 
-    attrs = {"__module__": module, "Meta": Meta}
+    attrs = {"__module__": module, "Meta": Meta, "is_dynamic_model": True}
 
     if field_definitions:
         attrs["id"] = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -62,21 +82,65 @@ def create_dynamic_model(name, field_definitions=None, app_label="", module="",
     return model
 
 
+def get_dynamic_model(model_name):
+    """
+    Look up a dynamic model in the app registry, raises LookupError if it is not registered.
+    """
+    try:
+        model = apps.get_model(APP_NAME, model_name)
+    except LookupError:
+        record_registry_lookup(hit=False)
+        raise
+    record_registry_lookup(hit=True)
+    return model
+
+
+# Guards apps.all_models against concurrent (re)registrations
+_registry_lock = threading.RLock()
+
+
+@timed("registry")
 def register_dynamic_model(app_label, model_name, field_definitions, module):
-    model = create_dynamic_model(model_name, field_definitions, app_label, module)
+    with _registry_lock:
+        model = create_dynamic_model(model_name, field_definitions, app_label, module)
 
-    # Register the model with Django's app registry
-    apps.register_model(APP_NAME, model)
-    apps.all_models[app_label][model_name.lower()] = model
+        # Register the model with Django's app registry
+        apps.register_model(APP_NAME, model)
+        apps.all_models[app_label][model_name.lower()] = model
+    update_registered_models()
     return model
 
 
+def unregister_dynamic_model(model_name):
+    """
+    Remove the model of one table from the app registry, leaving the other dynamic models alone.
+    """
+    with _registry_lock:
+        apps.all_models[APP_NAME].pop(model_name.lower(), None)
+        apps.clear_cache()
+
+
+def refresh_dynamic_model(model_name, field_definitions):
+    """
+    Replace the registered model of one table after its schema changed, leaving the other
+    dynamic models alone.
+    """
+    with _registry_lock:
+        unregister_dynamic_model(model_name)
+        return register_dynamic_model(
+            APP_NAME, model_name, field_definitions, "main.apps.tablebuilder.models"
+        )
+
+
+@timed("schema_editor")
 def create_db_table(model):
     # Use the schema_editor to create the table
     with connection.schema_editor() as schema_editor:
         schema_editor.create_model(model)
+    SCHEMA_CHANGES.labels("create").inc()
 
 
+@timed("schema_editor")
 def add_field_to_model(model, field_name, field_type):
     """
     Adds a field to a model
@@ -89,34 +153,45 @@ def add_field_to_model(model, field_name, field_type):
         field_class.set_attributes_from_name(field_name)
         field_class.model = model
         schema_editor.add_field(model, field_class)
+    SCHEMA_CHANGES.labels("add").inc()
 
 
-def modify_model(model, old_field_name, field_name, field_type):
+@timed("schema_editor")
+def rename_fields(model, renames):
     """
-    Modify a model using Django's SchemaEditor.
-    """
-
-    # Get the old field from the model
-    try:
-        old_field = model._meta.get_field(old_field_name)
-    except FieldDoesNotExist:
-        print(f"Field {old_field_name} does not exist on model {model}.")
-        return
+    Rename fields of a model, through temporary names so renamed fields can swap names, then
+    alter the ones whose type changed.
 
-    # Alter the field using the schema editor
+    :param renames: {old field name: (new field name, new field type)}
+    """
     with connection.schema_editor() as schema_editor:
-        # Create a new field instance
-        field_class = _get_field_class(field_name, field_type)
-        field_class.set_attributes_from_name(field_name)
-        field_class.model = model
-        schema_editor.alter_field(model, old_field, field_class)
 
-    # Register the model with Django's app registry
-    apps.register_model(APP_NAME, model)
-    apps.all_models[APP_NAME][model.__name__.lower()] = model
-    reload_app_models()
+        def rename_column(old_column, new_column):
+            schema_editor.execute(
+                schema_editor.sql_rename_column
+                % {
+                    "table": schema_editor.quote_name(model._meta.db_table),
+                    "old_column": schema_editor.quote_name(old_column),
+                    "new_column": schema_editor.quote_name(new_column),
+                }
+            )
+
+        for old_field_name in renames:
+            rename_column(old_field_name, f"{old_field_name}__renamed")
+        for old_field_name, (field_name, field_type) in renames.items():
+            rename_column(f"{old_field_name}__renamed", field_name)
+            old_field = model._meta.get_field(old_field_name).clone()
+            old_field.set_attributes_from_name(field_name)
+            old_field.model = model
+            field_class = _get_field_class(field_name, field_type)
+            field_class.set_attributes_from_name(field_name)
+            field_class.model = model
+            if old_field.db_parameters(connection) != field_class.db_parameters(connection):
+                schema_editor.alter_field(model, old_field, field_class)
+            SCHEMA_CHANGES.labels("alter").inc()
 
 
+@timed("schema_editor")
 def remove_fields_from_model(model, fields_to_remove):
     """
     Removes specified fields from a model
@@ -125,6 +200,7 @@ def remove_fields_from_model(model, fields_to_remove):
         for field_name in fields_to_remove:
             field = model._meta.get_field(field_name)
             schema_editor.remove_field(model, field)
+            SCHEMA_CHANGES.labels("remove").inc()
 
 
 def reload_app_models():
@@ -137,9 +213,13 @@ def reload_app_models():
     module = apps.get_app_config(APP_NAME).name
     reload(sys.modules[module])
 
-    # Reset the apps cache
-    apps.all_models[APP_NAME].clear()
-    apps.clear_cache()
+    # Unregister the dynamic models only, the app's own models keep their reverse relations
+    with _registry_lock:
+        for name, model in list(apps.all_models[APP_NAME].items()):
+            if getattr(model, "is_dynamic_model", False):
+                del apps.all_models[APP_NAME][name]
+        apps.clear_cache()
+    update_registered_models()
 
 
 def sequence(number):
@@ -153,26 +233,81 @@ def sequence(number):
     }
 
 
-def generate_tables_on_startup():
-    if "tablebuilder_tablestructure" not in connection.introspection.table_names():
+@STARTUP_REGISTRATION.time()
+def generate_tables_on_startup(snapshot_path=None):
+    """
+    Register a model for every TableStructure and create the missing tables.
+
+    The schema is read from the compiled snapshot at `snapshot_path` (default
+    `TABLEBUILDER_SCHEMA_SNAPSHOT`) when set, otherwise from the database.
+    """
+    table_names = connection.introspection.table_names()
+    if "tablebuilder_tablestructure" not in table_names:
         return
-    queryset = TableStructure.objects.all()
-    count = len(queryset)
-    if count > 0:
+    snapshot_path = snapshot_path or settings.TABLEBUILDER_SCHEMA_SNAPSHOT
+    tables = load_schema(snapshot_path) if snapshot_path else build_schema()
+    if len(tables) > 0:
         reload_app_models()
-    for table_structure in queryset:
+    existing_tables = set(table_names)
+    for name, fields in tables:
         field_definitions = [
-            {"name": field.name, "type": field.type}
-            for field in table_structure.field_definitions.all()
+            {"name": field_name, "type": field_type} for field_name, field_type in fields
         ]
         model = register_dynamic_model(
             APP_NAME,
-            table_structure.name,
+            name,
             field_definitions,
             "main.apps.tablebuilder.models",
         )
+        if model._meta.db_table in existing_tables:
+            continue
         try:
             create_db_table(model)
         except Exception as exc:
-            print(f"Error while creating model or table for {table_structure.name}: {exc}")
+            print(f"Error while creating model or table for {name}: {exc}")
             continue
+
+
+_warm_tables_lock = threading.Lock()
+_tables_warmed = False
+
+
+def warm_tables(force=False):
+    """
+    Idempotent startup hook: run `generate_tables_on_startup` once per process.
+
+    :return: True if the tables were generated by this call
+    """
+    global _tables_warmed
+    if _tables_warmed and not force:
+        return False
+    with _warm_tables_lock:
+        if _tables_warmed and not force:
+            return False
+        generate_tables_on_startup()
+        _tables_warmed = True
+    return True
+
+
+def warm_tables_on_server_start():
+    """
+    Called when the WSGI/ASGI application is loaded, warms the tables in "eager" mode.
+    """
+    if settings.TABLEBUILDER_STARTUP_MODE != "eager":
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        warm_tables()
+        return
+    # uvicorn workers import the application inside their event loop, where the ORM refuses
+    # to run: warm the tables from a thread and wait for it
+
+    def warm():
+        try:
+            warm_tables()
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(warm).result()
@@ -0,0 +1,99 @@
+"""Per-request query and timing instrumentation.
+
+`track_request` installs a `RequestStats` for the current request (a context variable, so it
+follows the request into `sync_to_async` threads). `QueryCounter` is an execute wrapper that
+counts queries and DB time, `timed`/`timer` add wall time to a named bucket and
+`record_registry_lookup` counts dynamic model registry hits and misses.
+Outside of a tracked request all of them are no-ops.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+_current_stats = ContextVar("tablebuilder_request_stats", default=None)
+
+
+class RequestStats:
+    """Counters collected while serving one request"""
+
+    def __init__(self, capture_sql=False):
+        self.capture_sql = capture_sql
+        self.queries = 0
+        self.db_time = 0.0
+        self.sql = []
+        self.timers = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.registry_hits = 0
+        self.registry_misses = 0
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+@contextmanager
+def track_request(capture_sql=False):
+    stats = RequestStats(capture_sql=capture_sql)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryCounter:
+    """`connection.execute_wrapper` callable that records every query in the request stats"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.stats.queries += 1
+            self.stats.db_time += duration
+            if self.stats.capture_sql:
+                self.stats.sql.append((sql, duration))
+
+
+@contextmanager
+def timer(name):
+    stats = current_stats()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timers[name] += time.perf_counter() - start
+        stats.calls[name] += 1
+
+
+def timed(name):
+    """Decorator version of `timer`"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_registry_lookup(hit):
+    stats = current_stats()
+    if stats is None:
+        return
+    if hit:
+        stats.registry_hits += 1
+    else:
+        stats.registry_misses += 1
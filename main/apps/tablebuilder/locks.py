@@ -0,0 +1,82 @@
+"""Per-table locks for schema changes.
+
+Schema changes of one table are serialized, changes of different tables run in parallel. On
+PostgreSQL the lock is a transaction-level advisory lock keyed by the `TableStructure` id, on
+SQLite an exclusive `flock` on a lock file per table. Waiting is bounded by
+`TABLEBUILDER_DDL_LOCK_TIMEOUT`, after which `TableLockedException` (409) is raised.
+"""
+import fcntl
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from main.apps.tablebuilder.exceptions import TableLockedException
+
+# SQLSTATEs lock_not_available (lock_timeout) and query_canceled (statement_timeout)
+LOCK_NOT_AVAILABLE = "55P03"
+QUERY_CANCELED = "57014"
+
+
+def advisory_lock_key(pk):
+    """
+    :return: a signed 64-bit advisory lock key derived from the uuid `pk`
+    """
+    return int.from_bytes(pk.bytes[:8], "big", signed=True)
+
+
+def set_ddl_timeouts(cursor):
+    """
+    Bound the lock waits and statements of the rest of the PostgreSQL transaction by
+    `TABLEBUILDER_DDL_LOCK_TIMEOUT` and `TABLEBUILDER_DDL_STATEMENT_TIMEOUT`.
+    """
+    cursor.execute(
+        "SELECT set_config('lock_timeout', %s, true), set_config('statement_timeout', %s, true)",
+        [
+            f"{int(settings.TABLEBUILDER_DDL_LOCK_TIMEOUT * 1000)}ms",
+            f"{int(settings.TABLEBUILDER_DDL_STATEMENT_TIMEOUT * 1000)}ms",
+        ],
+    )
+
+
+@contextmanager
+def table_schema_lock(pk):
+    """
+    Hold the schema lock of table `pk`. On PostgreSQL it must be entered in a transaction and
+    is held until the transaction ends; `lock_timeout`/`statement_timeout` are set for the rest
+    of the transaction, so they apply to its DDL too, and hitting either in the locked block
+    raises `TableLockedException`.
+    """
+    if connection.vendor == "postgresql":
+        if not connection.in_atomic_block:
+            raise RuntimeError("table_schema_lock must be used inside transaction.atomic()")
+        try:
+            with connection.cursor() as cursor:
+                set_ddl_timeouts(cursor)
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [advisory_lock_key(pk)])
+            yield
+        except OperationalError as exc:
+            if getattr(exc.__cause__, "pgcode", None) in (LOCK_NOT_AVAILABLE, QUERY_CANCELED):
+                raise TableLockedException() from exc
+            raise
+        return
+
+    path = os.path.join(tempfile.gettempdir(), f"tablebuilder-{pk}.lock")
+    with open(path, "a") as file:
+        timeout = settings.TABLEBUILDER_DDL_LOCK_TIMEOUT
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if timeout and time.monotonic() >= deadline:
+                    raise TableLockedException()
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
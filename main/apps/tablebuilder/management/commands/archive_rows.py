@@ -0,0 +1,44 @@
+from django.core.exceptions import FieldError
+from django.core.management.base import BaseCommand
+
+from main.apps.tablebuilder.archive import archive_rows
+from main.apps.tablebuilder.constants import ARCHIVE_BATCH_SIZE
+from main.apps.tablebuilder.exceptions import TableLockedException
+from main.apps.tablebuilder.helpers import get_dynamic_model, warm_tables
+from main.apps.tablebuilder.models import ArchivalPolicy
+
+
+class Command(BaseCommand):
+    help = "Move the rows matching the archival policy of each table to compressed chunk files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tables", nargs="*", help="Names of the tables, all by default.")
+        parser.add_argument(
+            "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Rows per chunk file."
+        )
+
+    def handle(self, *args, **options):
+        warm_tables()
+        policies = ArchivalPolicy.objects.select_related("table_structure").order_by(
+            "table_structure__name"
+        )
+        if options["tables"]:
+            policies = policies.filter(table_structure__name__in=options["tables"])
+        total = 0
+        for policy in policies:
+            table_structure = policy.table_structure
+            try:
+                chunks, rows = archive_rows(
+                    table_structure,
+                    get_dynamic_model(table_structure.name),
+                    policy.filter,
+                    options["batch_size"],
+                )
+            except (FieldError, TableLockedException) as exc:
+                # A field of the policy was removed, or the schema is being changed
+                self.stderr.write(f"{table_structure.name}: {exc}")
+                continue
+            if rows:
+                self.stdout.write(f"{table_structure.name}: {rows} rows in {chunks} chunks")
+            total += rows
+        self.stdout.write(f"Archived {total} rows.")
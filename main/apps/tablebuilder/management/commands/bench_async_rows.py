@@ -0,0 +1,122 @@
+"""Compare the WSGI `rows` action with the ASGI async rows endpoint under concurrent clients.
+
+With `--serve` the command starts gunicorn (WSGI) and uvicorn (ASGI) itself, with the same
+number of workers, against the configured database:
+
+    python manage.py bench_async_rows --serve --table users --rows 2000 --clients 100
+
+Without it, point `--wsgi-url` and `--asgi-url` at servers started separately, e.g.
+
+    gunicorn main.wsgi:application -w 4 -b 127.0.0.1:8000
+    uvicorn main.asgi:application --workers 4 --port 8001
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from main.apps.tablebuilder.benchmarks import http_request, run_server, summarize
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import generate_tables_on_startup
+from main.apps.tablebuilder.models import TableStructure
+
+
+class Command(BaseCommand):
+    help = "Benchmark WSGI vs ASGI rows reads with many concurrent (optionally slow) clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--table", required=True, help="Name of the dynamic table to read.")
+        parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--asgi-url", default="http://127.0.0.1:8001")
+        parser.add_argument(
+            "--serve",
+            action="store_true",
+            help="Start gunicorn and uvicorn on free ports instead of using the URLs.",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Server workers with --serve.")
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=0,
+            help="Insert rows until the table has at least this many.",
+        )
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=10, help="Requests per client.")
+        parser.add_argument(
+            "--read-delay",
+            type=float,
+            default=0.0,
+            help="Seconds a client sleeps between body reads, to emulate slow clients.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            table_structure = TableStructure.objects.get(name=options["table"])
+        except TableStructure.DoesNotExist as exc:
+            raise CommandError(f"Table `{options['table']}` does not exist.") from exc
+
+        if options["rows"]:
+            self._fill(table_structure, options["rows"])
+
+        results = {
+            "table": table_structure.name,
+            "clients": options["clients"],
+            "requests_per_client": options["requests"],
+            "read_delay": options["read_delay"],
+        }
+        with ExitStack() as stack:
+            wsgi_url, asgi_url = options["wsgi_url"], options["asgi_url"]
+            if options["serve"]:
+                wsgi_url, asgi_url = self._serve(stack, options["workers"])
+                results["workers"] = options["workers"]
+
+            results["wsgi"] = self._run(f"{wsgi_url}/api/table/{table_structure.pk}/rows/", options)
+            results["asgi"] = self._run(
+                f"{asgi_url}/api/async/table/{table_structure.pk}/rows/", options
+            )
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def _fill(self, table_structure, rows):
+        generate_tables_on_startup()
+        model = apps.get_model(APP_NAME, table_structure.name)
+        missing = rows - model.objects.count()
+        if missing <= 0:
+            return
+        values = {
+            "CharField": lambda i: f"value-{i}",
+            "IntegerField": lambda i: i,
+            "BooleanField": lambda i: i % 2 == 0,
+        }
+        fields = [field for field in model._meta.fields if not field.primary_key]
+        model.objects.bulk_create(
+            [
+                model(**{field.name: values[field.get_internal_type()](i) for field in fields})
+                for i in range(missing)
+            ],
+            batch_size=1000,
+        )
+
+    def _serve(self, stack, workers):
+        wsgi_url = stack.enter_context(run_server("wsgi", workers))
+        asgi_url = stack.enter_context(run_server("asgi", workers))
+        return wsgi_url, asgi_url
+
+    def _run(self, url, options):
+        def client():
+            outcomes = []
+            for _ in range(options["requests"]):
+                outcomes.append(http_request(url, read_delay=options["read_delay"]))
+            return outcomes
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["clients"]) as executor:
+            futures = [executor.submit(client) for _ in range(options["clients"])]
+            outcomes = [outcome for future in futures for outcome in future.result()]
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for status, latency in outcomes if status == 200]
+        return summarize(latencies, elapsed, errors=len(outcomes) - len(latencies))
@@ -0,0 +1,58 @@
+"""Per-request latency with and without connection reuse against the configured database.
+
+    python manage.py bench_connections --requests 500
+
+Each request goes through the full Django stack to the table list endpoint. The connection
+lifecycle of a real request (`close_old_connections` on request start and finish) is applied
+around every request, so `CONN_MAX_AGE = 0` pays a new connection each time.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client
+
+from main.apps.tablebuilder.benchmarks import summarize
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request latency with a new connection per request vs reused ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--url", default="/api/table/")
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        configured = settings_dict["CONN_MAX_AGE"]
+        modes = {"no_reuse": 0, "persistent": configured or 60}
+        if settings_dict.get("OPTIONS", {}).get("pool"):
+            # The pool hands out connections on connect and takes them back on close
+            modes = {"pool": 0}
+
+        results = {"vendor": connection.vendor, "requests": options["requests"]}
+        try:
+            for mode, conn_max_age in modes.items():
+                settings_dict["CONN_MAX_AGE"] = conn_max_age
+                connection.close()
+                results[mode] = self._run(options["url"], options["requests"])
+        finally:
+            settings_dict["CONN_MAX_AGE"] = configured
+            connection.close()
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def _run(self, url, requests):
+        client = Client(HTTP_HOST="localhost")
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            request_start = time.perf_counter()
+            close_old_connections()
+            response = client.get(url)
+            close_old_connections()
+            latencies.append(time.perf_counter() - request_start)
+            errors += response.status_code != 200
+        return summarize(latencies, time.perf_counter() - start, errors=errors)
@@ -0,0 +1,271 @@
+"""Benchmark suite for the tablebuilder hot paths.
+
+    python manage.py bench_tablebuilder --output bench.json
+
+Runs against the configured database (PostgreSQL by default, SQLite with
+`DATABASE_URL=sqlite:////tmp/bench.sqlite3` after `migrate`). Every benchmark table is prefixed
+with `--prefix` and dropped afterwards. Results are emitted as JSON so runs across releases can be
+compared.
+"""
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from main.apps.tablebuilder.benchmarks import save_table_serializer
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
+from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.serializers import TableStructureSerializer, create_serializer
+from main.apps.tablebuilder.validators import get_row_validator
+
+FIELD_TYPES = ("string", "number", "boolean")
+ROW_VALUES = {
+    "string": lambda i: f"value-{i}",
+    "number": lambda i: i,
+    "boolean": lambda i: i % 2 == 0,
+}
+
+
+def _field_definitions(count, prefix="field"):
+    return [
+        {"name": f"{prefix}_{i}", "type": FIELD_TYPES[i % len(FIELD_TYPES)]} for i in range(count)
+    ]
+
+
+def _row(field_definitions, i):
+    return {field["name"]: ROW_VALUES[field["type"]](i) for field in field_definitions}
+
+
+def _stats(samples):
+    """
+    :param samples: durations in seconds
+    :return: a dict with the timing statistics in milliseconds
+    """
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark table creation, schema updates, startup registration, row writes and reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="bench_", help="Prefix of the benchmark tables.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark.")
+        parser.add_argument("--fields", type=int, default=10, help="Fields per table.")
+        parser.add_argument(
+            "--update-fields",
+            type=int,
+            nargs="+",
+            default=[1, 10, 50],
+            help="Numbers of fields replaced by a schema update.",
+        )
+        parser.add_argument(
+            "--startup-tables",
+            type=int,
+            nargs="+",
+            default=[10, 100],
+            help="Numbers of tables registered by generate_tables_on_startup.",
+        )
+        parser.add_argument("--inserts", type=int, default=200, help="Single row inserts.")
+        parser.add_argument(
+            "--validations",
+            type=int,
+            default=2000,
+            help="Rows validated by the row validation benchmark.",
+        )
+        parser.add_argument(
+            "--read-sizes",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 10000],
+            help="Table sizes for the rows read benchmark.",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+
+    def handle(self, *args, **options):
+        self.prefix = options["prefix"]
+        self.counter = 0
+        self.client = Client(HTTP_HOST="localhost")
+        self._cleanup()
+        results = {
+            "meta": {
+                "vendor": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "options": {
+                    key: options[key]
+                    for key in (
+                        "repeat",
+                        "fields",
+                        "update_fields",
+                        "startup_tables",
+                        "inserts",
+                        "validations",
+                        "read_sizes",
+                    )
+                },
+            },
+        }
+        try:
+            results["create_table"] = self.bench_create_table(options)
+            results["update_schema"] = self.bench_update_schema(options)
+            results["startup"] = self.bench_startup(options)
+            results["row_insert"] = self.bench_row_insert(options)
+            results["row_validation"] = self.bench_row_validation(options)
+            results["rows_read"] = self.bench_rows_read(options)
+        finally:
+            self._cleanup()
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def _name(self):
+        self.counter += 1
+        return f"{self.prefix}{self.counter}"
+
+    def _create_table(self, field_definitions):
+        serializer = TableStructureSerializer(
+            data={"name": self._name(), "field_definitions": field_definitions}
+        )
+        serializer.is_valid(raise_exception=True)
+        return save_table_serializer(serializer)
+
+    def _cleanup(self):
+        for table_structure in TableStructure.objects.filter(name__startswith=self.prefix):
+            model = apps.all_models[APP_NAME].pop(table_structure.name.lower(), None)
+            if model is not None:
+                with connection.schema_editor() as schema_editor:
+                    schema_editor.delete_model(model)
+            table_structure.delete()
+        apps.clear_cache()
+
+    def bench_create_table(self, options):
+        field_definitions = _field_definitions(options["fields"])
+        samples = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            self._create_table(field_definitions)
+            samples.append(time.perf_counter() - start)
+        return {"fields": options["fields"], **_stats(samples)}
+
+    def bench_update_schema(self, options):
+        results = []
+        for count in options["update_fields"]:
+            samples = []
+            for _ in range(options["repeat"]):
+                table_structure = self._create_table(_field_definitions(count))
+                serializer = TableStructureSerializer(
+                    instance=table_structure,
+                    data={
+                        "name": table_structure.name,
+                        "field_definitions": _field_definitions(count, prefix="updated"),
+                    },
+                )
+                serializer.is_valid(raise_exception=True)
+                start = time.perf_counter()
+                save_table_serializer(serializer)
+                samples.append(time.perf_counter() - start)
+            results.append({"fields": count, **_stats(samples)})
+        return results
+
+    def bench_startup(self, options):
+        results = []
+        field_definitions = _field_definitions(options["fields"])
+        for count in options["startup_tables"]:
+            existing = TableStructure.objects.filter(name__startswith=self.prefix).count()
+            for _ in range(count - existing):
+                self._create_table(field_definitions)
+            existing = max(count, existing)
+            samples = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                reload_app_models()
+                generate_tables_on_startup()
+                samples.append(time.perf_counter() - start)
+            results.append(
+                {
+                    "benchmark_tables": existing,
+                    "total_tables": TableStructure.objects.count(),
+                    **_stats(samples),
+                }
+            )
+        return results
+
+    def bench_row_insert(self, options):
+        field_definitions = _field_definitions(options["fields"])
+        table_structure = self._create_table(field_definitions)
+        url = f"/api/table/{table_structure.pk}/row/"
+        samples = []
+        for i in range(options["inserts"]):
+            data = json.dumps(_row(field_definitions, i))
+            start = time.perf_counter()
+            response = self.client.post(url, data, content_type="application/json")
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(response.content)
+        return {"fields": options["fields"], **_stats(samples)}
+
+    def bench_row_validation(self, options):
+        """CPU per row of the compiled row validator against the table's ModelSerializer"""
+        field_definitions = _field_definitions(options["fields"])
+        table_structure = self._create_table(field_definitions)
+        model = apps.get_model(APP_NAME, table_structure.name)
+        rows = [_row(field_definitions, i) for i in range(options["validations"])]
+
+        start = time.process_time()
+        for row in rows:
+            create_serializer(table_structure.name)(data=row).is_valid(raise_exception=True)
+        serializer_s = time.process_time() - start
+
+        start = time.process_time()
+        validator = get_row_validator(table_structure, model)
+        for row in rows:
+            validator.validate(row)
+        validator_s = time.process_time() - start
+
+        return {
+            "fields": options["fields"],
+            "rows": len(rows),
+            "serializer_us": round(serializer_s / len(rows) * 1e6, 2),
+            "validator_us": round(validator_s / len(rows) * 1e6, 2),
+            "speedup": round(serializer_s / validator_s, 1) if validator_s else None,
+        }
+
+    def bench_rows_read(self, options):
+        field_definitions = _field_definitions(options["fields"])
+        table_structure = self._create_table(field_definitions)
+        model = apps.get_model(APP_NAME, table_structure.name)
+        url = f"/api/table/{table_structure.pk}/rows/"
+        results = []
+        size = 0
+        for target in sorted(options["read_sizes"]):
+            model.objects.bulk_create(
+                [model(**_row(field_definitions, i)) for i in range(size, target)],
+                batch_size=1000,
+            )
+            size = target
+            samples = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                response = self.client.get(url)
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(response.content)
+            results.append({"rows": size, **_stats(samples)})
+        return results
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.apps.tablebuilder.changelog import compact_changes
+from main.apps.tablebuilder.models import TableStructure
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the row changes older than the retention period that every summary has already "
+        "folded in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=settings.TABLEBUILDER_CHANGE_RETENTION_DAYS,
+            help="Keep the changes of change feed tables for this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["retention_days"])
+        total = 0
+        for table_structure in TableStructure.objects.filter(row_changes__isnull=False).distinct():
+            deleted = compact_changes(table_structure, before, options["batch_size"])
+            if deleted:
+                self.stdout.write(f"{table_structure.name}: {deleted} changes")
+            total += deleted
+        self.stdout.write(f"Compacted {total} row changes.")
@@ -0,0 +1,90 @@
+"""Export dynamic tables in parallel.
+
+    python manage.py export_tables --output-dir /tmp/export --workers 4 users orders
+
+Every table is exported by a worker of a process pool, each with its own database connection,
+to `<table>.parquet` (pyarrow installed) or `<table>/part-*.csv.gz` plus `<table>/schema.json`.
+A `manifest.json` listing the written files is added to the output directory.
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from main.apps.tablebuilder.export import CSV, PARQUET, default_format, export_table, pa
+from main.apps.tablebuilder.helpers import warm_tables
+from main.apps.tablebuilder.snapshot import build_schema
+
+
+def _export_table(*args):
+    """Process pool task, see export.export_table"""
+    try:
+        return export_table(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Export dynamic tables to Parquet (or gzip CSV) files in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tables", nargs="*", help="Tables to export, all of them if omitted.")
+        parser.add_argument("--output-dir", required=True)
+        parser.add_argument("--format", choices=[PARQUET, CSV], default=default_format())
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help="Export processes, 1 exports in this process.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=10000, help="Rows fetched (and written) at a time."
+        )
+        parser.add_argument("--rows-per-file", type=int, default=1000000, help="Rows per CSV part.")
+
+    def handle(self, *args, **options):
+        if options["format"] == PARQUET and pa is None:
+            raise CommandError("Parquet export requires pyarrow, use --format=csv.")
+        warm_tables()
+        schema = dict((name, fields) for name, fields in build_schema())
+        names = options["tables"] or list(schema)
+        unknown = [name for name in names if name not in schema]
+        if unknown:
+            raise CommandError(f"Unknown tables: {', '.join(unknown)}")
+
+        directory = options["output_dir"]
+        os.makedirs(directory, exist_ok=True)
+        tasks = [
+            (
+                name,
+                schema[name],
+                directory,
+                options["format"],
+                options["chunk_size"],
+                options["rows_per_file"],
+            )
+            for name in names
+        ]
+        start = time.perf_counter()
+        if options["workers"] <= 1:
+            tables = [export_table(*task) for task in tasks]
+        else:
+            # Forked workers must not share the parent's connection
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                tables = list(executor.map(_export_table, *zip(*tasks)))
+
+        manifest = {
+            "format": options["format"],
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            "tables": tables,
+        }
+        with open(os.path.join(directory, "manifest.json"), "w") as file:
+            json.dump(manifest, file, indent=2)
+        self.stdout.write(json.dumps(manifest, indent=2))
@@ -0,0 +1,171 @@
+"""Generate synthetic dynamic tables and drive a mixed read/write workload against the API.
+
+    python manage.py generate_load --tables 20 --fields 10 --rows 100000 --workers 4 \
+        --serve --requests 2000 --concurrency 32 --read-ratio 0.8
+
+1. Creates `--tables` tables with `--fields` randomly typed fields.
+2. Fills each table with `--rows` rows through `bulk_create`, in parallel across a process pool
+   (one database connection per worker).
+3. Sends `--requests` requests to the API from `--concurrency` clients: `rows` reads with
+   probability `--read-ratio`, `row` inserts otherwise, and reports p50/p95/p99 latency.
+
+Everything random is derived from `--seed`, so two runs generate the same tables, rows and
+request sequence.
+"""
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from main.apps.tablebuilder.benchmarks import (
+    http_request,
+    run_server,
+    save_table_serializer,
+    summarize,
+)
+from main.apps.tablebuilder.factories import fake_field_definitions, fake_row
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.serializers import TableStructureSerializer
+
+
+def _fill_table(name, field_definitions, rows, seed, batch_size):
+    """Process pool task: insert `rows` rows into table `name`"""
+    rng = random.Random(seed)
+    model = get_dynamic_model(name)
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        model.objects.bulk_create(
+            [
+                model(**fake_row(rng, field_definitions))
+                for _ in range(min(batch_size, rows - offset))
+            ]
+        )
+    connections.close_all()
+    return name, rows, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Generate N tables x M fields x K rows and run a mixed read/write workload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="load_", help="Prefix of the generated tables.")
+        parser.add_argument("--tables", type=int, default=10)
+        parser.add_argument("--fields", type=int, default=10)
+        parser.add_argument("--rows", type=int, default=10000, help="Rows per table.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--base-url", help="API to drive the workload against, e.g. http://127.0.0.1:8000."
+        )
+        parser.add_argument(
+            "--serve",
+            action="store_true",
+            help="Start gunicorn on a free port and drive the workload against it.",
+        )
+        parser.add_argument("--server-workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--read-ratio", type=float, default=0.8)
+
+    def handle(self, *args, **options):
+        if TableStructure.objects.filter(name__startswith=options["prefix"]).exists():
+            raise CommandError(
+                f"Tables prefixed `{options['prefix']}` already exist, pick another --prefix."
+            )
+
+        results = {"options": {key: options[key] for key in ("tables", "fields", "rows", "seed")}}
+        tables = self._create_tables(options)
+        results["fill"] = self._fill(tables, options)
+
+        with ExitStack() as stack:
+            base_url = options["base_url"]
+            if options["serve"]:
+                base_url = stack.enter_context(run_server("wsgi", options["server_workers"]))
+            if base_url:
+                results["workload"] = self._workload(base_url, tables, options)
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def _create_tables(self, options):
+        rng = random.Random(options["seed"])
+        tables = []
+        for index in range(options["tables"]):
+            field_definitions = fake_field_definitions(rng, options["fields"])
+            serializer = TableStructureSerializer(
+                data={
+                    "name": f"{options['prefix']}{index}",
+                    "field_definitions": field_definitions,
+                }
+            )
+            serializer.is_valid(raise_exception=True)
+            table_structure = save_table_serializer(serializer)
+            tables.append((table_structure, field_definitions))
+        return tables
+
+    def _fill(self, tables, options):
+        # Forked workers must not share the parent's connection
+        connections.close_all()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _fill_table,
+                    table_structure.name,
+                    field_definitions,
+                    options["rows"],
+                    options["seed"] + index + 1,
+                    options["batch_size"],
+                )
+                for index, (table_structure, field_definitions) in enumerate(tables)
+            ]
+            filled = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        total_rows = sum(rows for _, rows, _ in filled)
+        return {
+            "rows": total_rows,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(total_rows / elapsed, 2) if elapsed else None,
+        }
+
+    def _workload(self, base_url, tables, options):
+        rng = random.Random(options["seed"])
+        plan = []
+        for _ in range(options["requests"]):
+            table_structure, field_definitions = rng.choice(tables)
+            if rng.random() < options["read_ratio"]:
+                plan.append(("read", f"{base_url}/api/table/{table_structure.pk}/rows/", None))
+            else:
+                plan.append(
+                    (
+                        "write",
+                        f"{base_url}/api/table/{table_structure.pk}/row/",
+                        fake_row(rng, field_definitions),
+                    )
+                )
+
+        def send(step):
+            kind, url, payload = step
+            method = "GET" if payload is None else "POST"
+            status, latency = http_request(url, method=method, payload=payload)
+            return kind, status, latency
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            outcomes = list(executor.map(send, plan))
+        elapsed = time.perf_counter() - start
+
+        report = {}
+        for kind in ("all", "read", "write"):
+            selected = [outcome for outcome in outcomes if kind in ("all", outcome[0])]
+            latencies = [latency for _, status, latency in selected if status == 200]
+            report[kind] = summarize(latencies, elapsed, errors=len(selected) - len(latencies))
+        return report
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from main.apps.tablebuilder.constants import TEARDOWN_BATCH_SIZE
+from main.apps.tablebuilder.models import DbJobProcess
+from main.apps.tablebuilder.teardown import run_job
+
+
+class Command(BaseCommand):
+    help = "Run the pending background table jobs, such as dropping destroyed tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=TEARDOWN_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        counts = {DbJobProcess.DONE: 0, DbJobProcess.FAILED: 0}
+        for job in DbJobProcess.objects.filter(status=DbJobProcess.PENDING).order_by("created"):
+            # Claim the job, another worker may have taken it since the query
+            if not DbJobProcess.objects.filter(pk=job.pk, status=DbJobProcess.PENDING).update(
+                status=DbJobProcess.RUNNING
+            ):
+                continue
+            run_job(job, options["batch_size"])
+            counts[job.status] += 1
+            if job.status == DbJobProcess.FAILED:
+                self.stderr.write(f"{job.type} {job.name}: {job.error}")
+        self.stdout.write(
+            f"Ran {counts[DbJobProcess.DONE]} jobs, {counts[DbJobProcess.FAILED]} failed."
+        )
@@ -0,0 +1,67 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.apps.tablebuilder.constants import APP_NAME, TEARDOWN_BATCH_SIZE
+from main.apps.tablebuilder.helpers import get_dynamic_model, warm_tables
+from main.apps.tablebuilder.models import DbJobProcess, TableStructure
+from main.apps.tablebuilder.search import side_tables
+from main.apps.tablebuilder.summaries import summary_table_name
+from main.apps.tablebuilder.teardown import drop_db_table
+
+
+def known_tables():
+    """
+    :return: names of the tables of this app something still refers to
+    """
+    tables = set(
+        model._meta.db_table
+        for model in apps.get_app_config(APP_NAME).get_models()
+        if not getattr(model, "is_dynamic_model", False)
+    )
+    for table_structure in TableStructure.objects.prefetch_related("summaries"):
+        model = get_dynamic_model(table_structure.name)
+        tables.add(model._meta.db_table)
+        tables.update(side_tables(model._meta.db_table))
+        tables.update(
+            summary_table_name(model, summary) for summary in table_structure.summaries.all()
+        )
+    # Dropped by their job
+    tables.update(
+        DbJobProcess.objects.filter(
+            type=DbJobProcess.DROP_TABLE,
+            status__in=[DbJobProcess.PENDING, DbJobProcess.RUNNING],
+        ).values_list("name", flat=True)
+    )
+    return tables
+
+
+class Command(BaseCommand):
+    help = (
+        "List the tables of this app that no table structure refers to anymore, and drop them "
+        "with --drop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drop", action="store_true", help="Drop the orphan tables.")
+        parser.add_argument("--batch-size", type=int, default=TEARDOWN_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        warm_tables()
+        known = known_tables()
+        orphans = sorted(
+            name
+            for name in connection.introspection.table_names()
+            if name.startswith(f"{APP_NAME}_") and name not in known
+        )
+        for name in orphans:
+            if options["drop"]:
+                # Dropping an FTS5 table drops its shadow tables, listed after it
+                if name not in connection.introspection.table_names():
+                    continue
+                drop_db_table(name, options["batch_size"])
+                self.stdout.write(f"Dropped {name}")
+            else:
+                self.stdout.write(name)
+        if not options["drop"]:
+            self.stdout.write(f"{len(orphans)} orphan tables, run with --drop to drop them.")
@@ -0,0 +1,31 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from main.apps.tablebuilder.helpers import get_dynamic_model, warm_tables
+from main.apps.tablebuilder.models import TableSummary
+from main.apps.tablebuilder.summaries import refresh_summary
+
+
+class Command(BaseCommand):
+    help = "Fold the rows changed since the last refresh into every table summary."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tables", nargs="*", help="Only refresh the summaries of these tables.")
+
+    def handle(self, *args, **options):
+        warm_tables()
+        summaries = TableSummary.objects.select_related("table_structure").order_by(
+            "table_structure__name", "name"
+        )
+        if options["tables"]:
+            summaries = summaries.filter(table_structure__name__in=options["tables"])
+        kinds = Counter()
+        for summary in summaries:
+            kind = refresh_summary(get_dynamic_model(summary.table_structure.name), summary)
+            kinds[kind] += 1
+            self.stdout.write(f"{summary.table_structure.name}.{summary.name}: {kind}")
+        self.stdout.write(
+            f"Refreshed {sum(kinds.values())} summaries "
+            f"({kinds['incremental']} incremental, {kinds['full']} full)."
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import generate_tables_on_startup
+
+
+class Command(BaseCommand):
+    help = "Register the dynamic models and create their missing tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshot",
+            help="Compiled schema snapshot to load, and to (re)build if it is stale. "
+            "Defaults to TABLEBUILDER_SCHEMA_SNAPSHOT.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        generate_tables_on_startup(snapshot_path=options["snapshot"])
+        elapsed = time.perf_counter() - start
+        registered = sum(
+            1
+            for model in apps.all_models[APP_NAME].values()
+            if getattr(model, "is_dynamic_model", False)
+        )
+        self.stdout.write(f"Registered {registered} dynamic models in {elapsed:.3f}s.")
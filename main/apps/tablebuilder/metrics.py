@@ -0,0 +1,66 @@
+"""Prometheus metrics for tablebuilder.
+
+Metrics are process-local. To aggregate the workers of a multi-process server, point the
+`PROMETHEUS_MULTIPROC_DIR` environment variable at a shared, empty directory before the
+workers start; the `/metrics` endpoint then merges the files every worker writes there.
+"""
+import os
+
+from django.apps import apps
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from main.apps.tablebuilder.constants import APP_NAME
+
+REQUEST_LATENCY = Histogram(
+    "tablebuilder_request_latency_seconds",
+    "Latency of tablebuilder API requests by action.",
+    ["action"],
+)
+ROWS_READ = Counter("tablebuilder_rows_read", "Rows read from dynamic tables.", ["action"])
+ROWS_WRITTEN = Counter("tablebuilder_rows_written", "Rows written to dynamic tables.", ["action"])
+SCHEMA_CHANGES = Counter(
+    "tablebuilder_schema_changes",
+    "Schema changes applied to dynamic tables by kind (create, add, alter, remove).",
+    ["kind"],
+)
+STARTUP_REGISTRATION = Histogram(
+    "tablebuilder_startup_registration_seconds",
+    "Duration of registering the dynamic models on startup.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300),
+)
+REGISTERED_MODELS = Gauge(
+    "tablebuilder_registered_models",
+    "Dynamic models registered in the app registry.",
+    multiprocess_mode="max",
+)
+
+
+def update_registered_models():
+    REGISTERED_MODELS.set(
+        sum(
+            1
+            for model in apps.all_models[APP_NAME].values()
+            if getattr(model, "is_dynamic_model", False)
+        )
+    )
+
+
+def render_metrics():
+    """
+    :return: (body, content type) in the Prometheus text exposition format
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
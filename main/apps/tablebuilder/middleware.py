@@ -0,0 +1,88 @@
+"""Middleware for the tablebuilder API"""
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from main.apps.tablebuilder.instrumentation import QueryCounter, track_request
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.3f}"
+
+
+class QueryInstrumentationMiddleware:
+    """Report query count and timings of every request in `X-*` response headers.
+
+    Requests slower than `TABLEBUILDER_SLOW_REQUEST_MS` are logged together with their SQL.
+    Runs natively in both the WSGI and the ASGI handler, the request stats live in a ContextVar.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TABLEBUILDER_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with self._track() as stats, ExitStack() as stack:
+            self._count_queries(stack, stats)
+            response = self.get_response(request)
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with self._track() as stats:
+            # Async views run their queries in the sync thread of the request, whose connections
+            # aren't the ones of the event loop thread
+            stack = await sync_to_async(self._count_queries)(ExitStack(), stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        return self._report(request, response, stats, time.perf_counter() - start)
+
+    def _track(self):
+        return track_request(capture_sql=bool(settings.TABLEBUILDER_SLOW_REQUEST_MS))
+
+    def _count_queries(self, stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(QueryCounter(stats)))
+        return stack
+
+    def _report(self, request, response, stats, elapsed):
+        response["X-Request-Time-Ms"] = _ms(elapsed)
+        response["X-Query-Count"] = stats.queries
+        response["X-DB-Time-Ms"] = _ms(stats.db_time)
+        response["X-Serializer-Time-Ms"] = _ms(stats.timers["serializer"])
+        response["X-Model-Registry-Time-Ms"] = _ms(stats.timers["registry"])
+        response["X-Model-Registry-Hits"] = stats.registry_hits
+        response["X-Model-Registry-Misses"] = stats.registry_misses
+        response["X-Schema-Editor-Calls"] = stats.calls["schema_editor"]
+        response["X-Schema-Editor-Time-Ms"] = _ms(stats.timers["schema_editor"])
+
+        slow_request_ms = settings.TABLEBUILDER_SLOW_REQUEST_MS
+        if slow_request_ms and elapsed * 1000 >= slow_request_ms:
+            logger.warning(
+                "Slow request %s %s took %sms with %s queries (%sms in DB):\n%s",
+                request.method,
+                request.path,
+                _ms(elapsed),
+                stats.queries,
+                _ms(stats.db_time),
+                "\n".join(f"[{_ms(duration)}ms] {sql}" for sql, duration in stats.sql),
+            )
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tablebuilder", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tablestructure",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tablebuilder", "0002_tablestructure_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tablestructure",
+            name="search_fields",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
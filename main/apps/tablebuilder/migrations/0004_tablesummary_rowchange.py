@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tablebuilder", "0003_tablestructure_search_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableSummary",
+            fields=[
+                (
+                    "created",
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, verbose_name="modified"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=63)),
+                ("group_by", models.JSONField(default=list)),
+                ("aggregates", models.JSONField(blank=True, default=list)),
+                ("refreshed_seq", models.BigIntegerField(default=None, null=True)),
+                (
+                    "table_structure",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="summaries",
+                        to="tablebuilder.tablestructure",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("table_structure", "name")},
+            },
+        ),
+        migrations.CreateModel(
+            name="RowChange",
+            fields=[
+                ("seq", models.BigAutoField(primary_key=True, serialize=False)),
+                ("row_id", models.UUIDField()),
+                ("operation", models.CharField(max_length=1)),
+                ("created", models.DateTimeField()),
+                (
+                    "table_structure",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="row_changes",
+                        to="tablebuilder.tablestructure",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["table_structure", "seq"],
+                        name="tablebuilde_table_s_b4a849_idx",
+                    )
+                ],
+            },
+        ),
+    ]
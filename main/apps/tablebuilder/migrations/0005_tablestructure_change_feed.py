@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tablebuilder", "0004_tablesummary_rowchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tablestructure",
+            name="change_feed",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="tablestructure",
+            name="changes_compacted_seq",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -30,3 +30,96 @@ class TableStructure(TimeStampedModel):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=TABLE_NAME_MAX_LENGTH, unique=True)
+    # Canonical hash of the field set, see helpers.schema_fingerprint
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
+    # "string" fields covered by the full-text index, empty when search is disabled
+    search_fields = models.JSONField(default=list, blank=True)
+    # Record row changes for the `changes` feed, see changelog.py
+    change_feed = models.BooleanField(default=False)
+    # Changes up to this RowChange.seq were compacted away
+    changes_compacted_seq = models.BigIntegerField(default=0)
+
+
+class TableSummary(TimeStampedModel):
+    """A named group-by summary of a dynamic table, materialized in its own table.
+
+    The summary table is refreshed incrementally from the `RowChange` log of its source table,
+    see summaries.refresh_summary.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=TABLE_NAME_MAX_LENGTH)
+    table_structure = models.ForeignKey(
+        "TableStructure", on_delete=models.CASCADE, related_name="summaries"
+    )
+    # ["field name", ...]
+    group_by = models.JSONField(default=list)
+    # [{"field": "field name", "function": "sum" | "min" | "max"}, ...]
+    aggregates = models.JSONField(default=list, blank=True)
+    # Last RowChange.seq folded into the summary table, null when it needs a full rebuild
+    refreshed_seq = models.BigIntegerField(null=True, default=None)
+
+    class Meta:
+        unique_together = ("table_structure", "name")
+
+
+class RowChange(models.Model):
+    """A row inserted (I), updated (U) or deleted (D) in a dynamic table, written by triggers."""
+
+    INSERT = "I"
+    UPDATE = "U"
+    DELETE = "D"
+
+    seq = models.BigAutoField(primary_key=True)
+    table_structure = models.ForeignKey(
+        "TableStructure", on_delete=models.CASCADE, related_name="row_changes"
+    )
+    row_id = models.UUIDField()
+    operation = models.CharField(max_length=1)
+    created = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["table_structure", "seq"])]
+
+
+class DbJobProcess(TimeStampedModel):
+    """Background job on a database table, run by the `process_db_jobs` command."""
+
+    DROP_TABLE = "drop_table"
+
+    PENDING = 0
+    DONE = 1
+    FAILED = 2
+    RUNNING = 3
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    type = models.CharField(max_length=50)
+    # Database table the job operates on
+    name = models.CharField(max_length=TABLE_NAME_MAX_LENGTH)
+    status = models.IntegerField(default=PENDING)
+    error = models.TextField(blank=True, default="")
+
+
+class ArchivalPolicy(TimeStampedModel):
+    """Rows of a dynamic table that the `archive_rows` command moves to compressed chunk files."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    table_structure = models.OneToOneField(
+        "TableStructure", on_delete=models.CASCADE, related_name="archival_policy"
+    )
+    # {"<field name>[__<lookup>]": value, ...}, rows matching all of them are archived
+    filter = models.JSONField(default=dict)
+
+
+class ArchiveChunk(TimeStampedModel):
+    """A gzip JSON lines file of rows archived from a dynamic table, see archive.py."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    table_structure = models.ForeignKey(
+        "TableStructure", on_delete=models.CASCADE, related_name="archive_chunks"
+    )
+    # Relative to TABLEBUILDER_ARCHIVE_DIR
+    path = models.CharField(max_length=255)
+    rows = models.IntegerField()
+    # Schema fingerprint of the table when the rows were archived
+    fingerprint = models.CharField(max_length=64)
@@ -0,0 +1,53 @@
+"""Query plans and the slow-query log of dynamic-table reads.
+
+Read actions return the plan of their query instead of its rows when asked to (`?explain=true`),
+executed with ANALYZE and BUFFERS on PostgreSQL for staff users (for everyone with
+`TABLEBUILDER_EXPLAIN_ANALYZE`). Every read is timed with `observe_query`, and the ones slower
+than `TABLEBUILDER_SLOW_QUERY_MS` are logged with their table and plan to the
+`slow_queries` rotating file (see LOGGING in the settings), to decide which indexes to add.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def explain_queryset(queryset, analyze=False):
+    """
+    :param analyze: execute the query and report the actual timings and buffers (PostgreSQL)
+    """
+    if analyze and connection.vendor == "postgresql":
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+
+def explain_sql(sql, params, analyze=False):
+    """`explain_queryset` of a raw query"""
+    if connection.vendor == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    # Same layout as QuerySet.explain()
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+@contextmanager
+def observe_query(table, action, plan):
+    """
+    Time the block and log it when slower than `TABLEBUILDER_SLOW_QUERY_MS`.
+
+    :param plan: callable returning the plan of the query, only called for slow queries
+    """
+    start = time.perf_counter()
+    yield
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    threshold = settings.TABLEBUILDER_SLOW_QUERY_MS
+    if threshold and elapsed_ms >= threshold:
+        logger.warning("Slow query on %s (%s) took %.3fms:\n%s", table, action, elapsed_ms, plan())
@@ -0,0 +1,148 @@
+"""Full-text search over the "string" fields of a dynamic table.
+
+PostgreSQL keeps a generated `tsvector` column with a GIN index on the table itself. SQLite keeps
+an external-content FTS5 table next to it, kept in sync with triggers. Both are dropped before and
+reinstalled after every schema change, since they depend on the columns being altered.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.backends.utils import truncate_name
+
+from main.apps.tablebuilder.constants import SEARCH_VECTOR_COLUMN
+from main.apps.tablebuilder.instrumentation import timed
+from main.apps.tablebuilder.metrics import SCHEMA_CHANGES
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _index_name(db_table):
+    return truncate_name(f"{db_table}_search", connection.ops.max_name_length())
+
+
+def _fts_table(db_table):
+    return truncate_name(f"{db_table}_fts", connection.ops.max_name_length())
+
+
+def side_tables(db_table):
+    """
+    :return: names of the tables the full-text index of `db_table` may keep next to it (the FTS5
+    table and its shadow tables on SQLite)
+    """
+    if connection.vendor == "postgresql":
+        return []
+    fts_table = _fts_table(db_table)
+    return [fts_table] + [
+        f"{fts_table}_{suffix}" for suffix in ("data", "idx", "content", "docsize", "config")
+    ]
+
+
+def _fts_query(query):
+    """Quote every term so user input can't be parsed as FTS5 query syntax"""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+@timed("schema_editor")
+def enable_full_text_search(model, field_names):
+    """
+    Index the columns `field_names` of the table of `model`, backfilling the existing rows.
+    """
+    db_table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            document = " || ' ' || ".join(f"coalesce({_qn(name)}, '')" for name in field_names)
+            cursor.execute(
+                f"ALTER TABLE {_qn(db_table)} ADD COLUMN {_qn(SEARCH_VECTOR_COLUMN)} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector(%s::regconfig, {document})) STORED",
+                [settings.TABLEBUILDER_SEARCH_CONFIG],
+            )
+            cursor.execute(
+                f"CREATE INDEX {_qn(_index_name(db_table))} ON {_qn(db_table)} "
+                f"USING GIN ({_qn(SEARCH_VECTOR_COLUMN)})"
+            )
+        else:
+            fts_table = _fts_table(db_table)
+            columns = ", ".join(_qn(name) for name in field_names)
+            new_values = ", ".join(f"new.{_qn(name)}" for name in field_names)
+            old_values = ", ".join(f"old.{_qn(name)}" for name in field_names)
+            delete = (
+                f"INSERT INTO {_qn(fts_table)} ({_qn(fts_table)}, rowid, {columns}) "
+                f"VALUES ('delete', old.rowid, {old_values});"
+            )
+            insert = (
+                f"INSERT INTO {_qn(fts_table)} (rowid, {columns}) "
+                f"VALUES (new.rowid, {new_values});"
+            )
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {_qn(fts_table)} USING fts5({columns}, "
+                f"content={_qn(db_table)}, content_rowid='rowid')"
+            )
+            cursor.execute(f"INSERT INTO {_qn(fts_table)} ({_qn(fts_table)}) VALUES ('rebuild')")
+            for suffix, event, body in (
+                ("ai", "INSERT", insert),
+                ("ad", "DELETE", delete),
+                ("au", "UPDATE", delete + " " + insert),
+            ):
+                cursor.execute(
+                    f"CREATE TRIGGER {_qn(f'{fts_table}_{suffix}')} AFTER {event} "
+                    f"ON {_qn(db_table)} BEGIN {body} END"
+                )
+    SCHEMA_CHANGES.labels("search").inc()
+
+
+@timed("schema_editor")
+def disable_full_text_search(model):
+    db_table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Dropping the column drops its index too
+            cursor.execute(
+                f"ALTER TABLE {_qn(db_table)} DROP COLUMN IF EXISTS {_qn(SEARCH_VECTOR_COLUMN)}"
+            )
+        else:
+            fts_table = _fts_table(db_table)
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {_qn(f'{fts_table}_{suffix}')}")
+            cursor.execute(f"DROP TABLE IF EXISTS {_qn(fts_table)}")
+
+
+def search_sql(model, query, limit, offset):
+    """
+    :return: (SQL, params) of the count query and of the page query of `search_rows`
+    """
+    db_table = _qn(model._meta.db_table)
+    columns = ", ".join(f"{db_table}.{_qn(field.column)}" for field in model._meta.concrete_fields)
+    pk = f"{db_table}.{_qn(model._meta.pk.column)}"
+    if connection.vendor == "postgresql":
+        vector = _qn(SEARCH_VECTOR_COLUMN)
+        source = f"{db_table}, websearch_to_tsquery(%s::regconfig, %s) AS query"
+        condition = f"{vector} @@ query"
+        rank = f"ts_rank({vector}, query)"
+        params = [settings.TABLEBUILDER_SEARCH_CONFIG, query]
+    else:
+        fts_table = _qn(_fts_table(model._meta.db_table))
+        source = f"{fts_table} JOIN {db_table} ON {db_table}.rowid = {fts_table}.rowid"
+        condition = f"{fts_table} MATCH %s"
+        # bm25() is lower for better matches
+        rank = f"-bm25({fts_table})"
+        params = [_fts_query(query)]
+
+    return (f"SELECT COUNT(*) FROM {source} WHERE {condition}", params), (
+        f"SELECT {columns}, {rank} AS rank FROM {source} WHERE {condition} "
+        f"ORDER BY rank DESC, {pk} LIMIT %s OFFSET %s",
+        params + [limit, offset],
+    )
+
+
+def search_rows(model, query, limit, offset):
+    """
+    :return: (number of matching rows, the page of matching model instances best first, each
+    with a `rank` attribute where higher is better)
+    """
+    count_query, page_query = search_sql(model, query, limit, offset)
+    with connection.cursor() as cursor:
+        cursor.execute(*count_query)
+        count = cursor.fetchone()[0]
+    hits = list(model.objects.raw(*page_query))
+    return count, hits
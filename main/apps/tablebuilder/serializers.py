@@ -1,22 +1,62 @@
 from uuid import uuid4 as uuid
 from django.apps import apps
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import Q
 from rest_framework import serializers
 
+from main.apps.tablebuilder.changelog import (
+    change_log_enabled,
+    install_change_log,
+    remove_change_log,
+)
+from main.apps.tablebuilder.clone import copy_rows
 from main.apps.tablebuilder.constants import (
     APP_NAME,
+    ARCHIVE_FILTER_LOOKUPS,
+    CHANGES_DEFAULT_LIMIT,
+    CHANGES_MAX_LIMIT,
+    CLONE_BATCH_SIZE,
+    INVALID_AGGREGATE_FIELD_EXCEPTION_MESSAGE,
+    INVALID_FILTER_FIELD_EXCEPTION_MESSAGE,
+    INVALID_FILTER_LOOKUP_EXCEPTION_MESSAGE,
+    INVALID_SEARCH_FIELD_EXCEPTION_MESSAGE,
+    INVALID_SUMMARY_FIELD_EXCEPTION_MESSAGE,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    SUMMARY_ALREADY_EXISTS_EXCEPTION_MESSAGE,
+    SUMMARY_FUNCTIONS,
+    TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE,
     TABLE_NAME_MAX_LENGTH,
     TABLE_FIELD_DEFAULT_STRING_LENGTH,
 )
+from main.apps.tablebuilder.exceptions import TableAlreadyExistsException
 from main.apps.tablebuilder.helpers import (
     add_field_to_model,
+    get_dynamic_model,
     register_dynamic_model,
     create_db_table,
-    modify_model,
+    refresh_dynamic_model,
     remove_fields_from_model,
+    rename_fields,
+    schema_fingerprint,
+)
+from main.apps.tablebuilder.instrumentation import timed
+from main.apps.tablebuilder.locks import table_schema_lock
+from main.apps.tablebuilder.models import (
+    ArchivalPolicy,
+    FieldDefinition,
+    TableStructure,
+    TableSummary,
 )
-from main.apps.tablebuilder.models import FieldDefinition, TableStructure
+from main.apps.tablebuilder.search import disable_full_text_search, enable_full_text_search
+from main.apps.tablebuilder.summaries import (
+    aggregate_column,
+    create_summary,
+    field_types,
+    rebuild_summaries_after_schema_change,
+)
+from main.apps.tablebuilder.teardown import destroy_table
 
 
 class FieldDefinitionSerializer(serializers.ModelSerializer):
@@ -52,13 +92,56 @@ class TableDefinitionReadOnlySerializer(serializers.Serializer):
     field_definitions = FieldDefinitionSerializer(many=True, required=True)
 
 
+class FieldDefinitionListSerializer(serializers.Serializer):
+    id = serializers.UUIDField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    type = serializers.CharField(read_only=True)
+
+
+class TableStructureListSerializer(serializers.Serializer):
+    """Read-only representation for list/retrieve, expects prefetched `field_definitions`"""
+
+    id = serializers.UUIDField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    fingerprint = serializers.CharField(read_only=True)
+    search_fields = serializers.ListField(read_only=True)
+    change_feed = serializers.BooleanField(read_only=True)
+    created = serializers.DateTimeField(read_only=True)
+    modified = serializers.DateTimeField(read_only=True)
+    field_definitions = FieldDefinitionListSerializer(many=True, read_only=True)
+
+
 class TableStructureSerializer(serializers.ModelSerializer):
     name = serializers.CharField(max_length=TABLE_FIELD_DEFAULT_STRING_LENGTH)
     field_definitions = FieldDefinitionSerializer(many=True)
+    search_fields = serializers.ListField(
+        child=serializers.CharField(max_length=TABLE_FIELD_DEFAULT_STRING_LENGTH), required=False
+    )
 
     class Meta:
         model = TableStructure
         fields = "__all__"
+        read_only_fields = ("fingerprint", "changes_compacted_seq")
+
+    def validate(self, attrs):
+        if attrs.get("search_fields"):
+            if "field_definitions" in attrs:
+                field_definitions = attrs["field_definitions"]
+            else:
+                field_definitions = self.instance.field_definitions.values("name", "type")
+            string_fields = set(
+                field.get("name") for field in field_definitions if field.get("type") == "string"
+            )
+            invalid = [name for name in attrs["search_fields"] if name not in string_fields]
+            if invalid:
+                raise serializers.ValidationError(
+                    {
+                        "search_fields": [
+                            f"`{name}` {INVALID_SEARCH_FIELD_EXCEPTION_MESSAGE}" for name in invalid
+                        ]
+                    }
+                )
+        return attrs
 
     @transaction.atomic
     def create(self, validated_data):
@@ -66,6 +149,7 @@ class TableStructureSerializer(serializers.ModelSerializer):
         field_definitions_data = []
         if "field_definitions" in validated_data:
             field_definitions_data = validated_data.pop("field_definitions", None)
+        validated_data["fingerprint"] = schema_fingerprint(field_definitions_data)
         table_structure = TableStructure.objects.create(**validated_data)
         custom_updater(
             "table_structure_id",
@@ -79,10 +163,47 @@ class TableStructureSerializer(serializers.ModelSerializer):
             APP_NAME, name, field_definitions_data, "main.apps.tablebuilder.models"
         )
         create_db_table(model)
+        if table_structure.search_fields:
+            enable_full_text_search(model, table_structure.search_fields)
+        if table_structure.change_feed:
+            install_change_log(model, table_structure)
         return table_structure
 
     @transaction.atomic
     def update(self, instance, validated_data):
+        if self._is_unchanged(instance, validated_data):
+            # Resubmitted schema is identical to the stored one, nothing to reconcile
+            return instance
+        with table_schema_lock(instance.pk):
+            # Another change may have been committed while waiting for the lock
+            instance.refresh_from_db()
+            if self._is_unchanged(instance, validated_data):
+                return instance
+            return self._update(instance, validated_data)
+
+    def _is_unchanged(self, instance, validated_data):
+        # The fingerprint ignores `old_name`, a rename (e.g. swapping two fields of one type)
+        # can keep it
+        return (
+            "field_definitions" in validated_data
+            and all(
+                field.get("old_name", field.get("name")) == field.get("name")
+                for field in validated_data["field_definitions"]
+            )
+            and validated_data.get("name", instance.name) == instance.name
+            and schema_fingerprint(validated_data["field_definitions"]) == instance.fingerprint
+            and validated_data.get("search_fields", instance.search_fields)
+            == instance.search_fields
+            and validated_data.get("change_feed", instance.change_feed) == instance.change_feed
+        )
+
+    def _update(self, instance, validated_data):
+        fingerprint = schema_fingerprint(validated_data.get("field_definitions", []))
+        old_search_fields = instance.search_fields
+        search_fields = validated_data.get("search_fields", old_search_fields)
+        old_change_feed = instance.change_feed
+        change_feed = validated_data.get("change_feed", old_change_feed)
+
         if validated_data.get("name"):
             instance.name = validated_data["name"]
 
@@ -99,66 +220,231 @@ class TableStructureSerializer(serializers.ModelSerializer):
                 FieldDefinitionSerializer,
                 field_definitions_data,
             )
+            instance.fingerprint = fingerprint
+            # Drop search fields that are no longer "string" fields of the table
+            string_fields = set(
+                field.get("name")
+                for field in field_definitions_data
+                if field.get("type") == "string"
+            )
+            search_fields = [name for name in search_fields if name in string_fields]
+        instance.search_fields = search_fields
+        instance.change_feed = change_feed
         instance.save()
         model = apps.get_model(APP_NAME, name, require_ready=False)
+        # The index depends on the columns altered below, reinstall it afterwards
+        if old_search_fields:
+            disable_full_text_search(model)
+
+        new_types = {field.get("name"): field.get("type") for field in field_definitions_data}
+        existing_field_names = set(
+            field.name for field in model._meta.fields if field.name != "id"
+        )  # Exclude the id field
+        # {old name: (name, type)} of the existing fields renamed through `old_name`
+        renames = {
+            field["old_name"]: (field.get("name"), field.get("type"))
+            for field in field_definitions_data
+            if field.get("old_name") in existing_field_names
+            and field["old_name"] != field.get("name")
+        }
+        renamed_to = set(name for name, _ in renames.values())
+        kept_field_names = (existing_field_names & set(new_types)) - renamed_to - set(renames)
+
+        # Remove fields first, a renamed field may take the name of a removed one
+        field_names_to_remove = existing_field_names - kept_field_names - set(renames)
+        if field_names_to_remove:
+            remove_fields_from_model(model, field_names_to_remove)
+
+        if renames:
+            rename_fields(model, renames)
+
+        for field_name in set(new_types) - kept_field_names - renamed_to:
+            add_field_to_model(model, field_name, new_types[field_name])
+
+        if search_fields:
+            enable_full_text_search(model, search_fields)
+
+        if field_definitions_data:
+            rebuild_summaries_after_schema_change(model, instance)
+
+        if change_log_enabled(instance):
+            # Rebuilding a SQLite table on ALTER drops its triggers, reinstall them
+            install_change_log(model, instance)
+        elif old_change_feed:
+            remove_change_log(model)
+
+        if field_definitions_data:
+            refresh_dynamic_model(instance.name, field_definitions_data)
 
-        # Get set of new field names
-        new_field_definitions = [field_definition for field_definition in field_definitions_data]
+        return instance
 
-        # Get set of existing field names
-        existing_field_definitions = [
-            field for field in model._meta.fields if field.name != "id"
-        ]  # Exclude the id field
 
-        new_field_names = set(field.get("name") for field in new_field_definitions)
-        existing_field_names = set(field.name for field in existing_field_definitions)
-        field_names_to_update = set(
-            field.get("old_name") for field in field_definitions_data if "old_name" in field
-        )
-        field_definitions_to_update = [
-            field for field in field_definitions_data if "old_name" in field
-        ]
-        # Identify the fields that need to be removed
-        field_names_to_remove = existing_field_names - new_field_names
-
-        # Identify the fields that need to be added
-        field_names_to_add = new_field_names - existing_field_names
-        # for field_definition in fields_to_add:existing_field_names
-        for field_name in field_names_to_add:
-            field_definition = [
-                field_def
-                for field_def in field_definitions_data
-                if field_def.get("name") == field_name
+class SummaryAggregateSerializer(serializers.Serializer):
+    field = serializers.CharField(max_length=TABLE_FIELD_DEFAULT_STRING_LENGTH)
+    function = serializers.ChoiceField(choices=SUMMARY_FUNCTIONS)
+
+
+class TableSummarySerializer(serializers.ModelSerializer):
+    """Declares a summary of the `table_structure` passed in the context"""
+
+    name = serializers.RegexField(r"^\w+$", max_length=TABLE_NAME_MAX_LENGTH)
+    group_by = serializers.ListField(
+        child=serializers.CharField(max_length=TABLE_FIELD_DEFAULT_STRING_LENGTH), min_length=1
+    )
+    aggregates = SummaryAggregateSerializer(many=True, required=False)
+
+    class Meta:
+        model = TableSummary
+        fields = ("id", "name", "group_by", "aggregates", "refreshed_seq")
+        read_only_fields = ("refreshed_seq",)
+
+    def validate(self, attrs):
+        table_structure = self.context["table_structure"]
+        if table_structure.summaries.filter(name=attrs["name"]).exists():
+            raise serializers.ValidationError(
+                {"name": [f"`{attrs['name']}` {SUMMARY_ALREADY_EXISTS_EXCEPTION_MESSAGE}"]}
+            )
+        types = field_types(table_structure)
+        errors = {}
+        invalid = [name for name in attrs["group_by"] if name not in types]
+        if invalid:
+            errors["group_by"] = [
+                f"`{name}` {INVALID_SUMMARY_FIELD_EXCEPTION_MESSAGE}" for name in invalid
             ]
-            if len(field_definition) < 1:
-                continue
-            field_definition = field_definition[0]
-            add_field_to_model(model, field_name, field_definition.get("type"))
-
-        for field_name in existing_field_names:
-            field_definition = [
-                field_def
-                for field_def in field_definitions_to_update
-                if field_def.get("old_name") == field_name
+        invalid = [
+            aggregate["field"]
+            for aggregate in attrs.get("aggregates", [])
+            if types.get(aggregate["field"]) != "number"
+        ]
+        if invalid:
+            errors["aggregates"] = [
+                f"`{name}` {INVALID_AGGREGATE_FIELD_EXCEPTION_MESSAGE}" for name in invalid
             ]
-            if len(field_definition) < 1:
-                continue
-            field_definition = field_definition[0]
+        if errors:
+            raise serializers.ValidationError(errors)
+        # Drop repeated aggregates, they would map to the same column
+        attrs["aggregates"] = list(
+            {
+                aggregate_column(aggregate): dict(aggregate)
+                for aggregate in attrs.get("aggregates", [])
+            }.values()
+        )
+        attrs["group_by"] = list(dict.fromkeys(attrs["group_by"]))
+        return attrs
 
-            column_name = field_definition.get("name")
-            column_type = field_definition.get("type")
-            old_column_name = field_definition.get("old_name")
-            try:
-                if not hasattr(model, field_name):
-                    modify_model(model, old_column_name, column_name, column_type)
-            except Exception as exc:
-                print(exc)
-                raise exc
+    @transaction.atomic
+    def create(self, validated_data):
+        table_structure = self.context["table_structure"]
+        with table_schema_lock(table_structure.pk):
+            summary = TableSummary.objects.create(table_structure=table_structure, **validated_data)
+            create_summary(get_dynamic_model(table_structure.name), summary)
+        return summary
 
-        # Remove fields
-        remove_fields_from_model(model, field_names_to_remove)
 
-        return instance
+def validate_row_filter(model, data, lookups=("exact",)):
+    """
+    :param data: {"<field name>[__<lookup>]": value, ...} conditions on the rows of `model`
+    :return: `data` with the values converted to the field types, for `QuerySet.filter`
+    :raises ValidationError: listing the unknown fields and lookups and the invalid values
+    """
+    field_names = set(field.name for field in model._meta.concrete_fields)
+    errors = []
+    filters = {}
+    for key, value in data.items():
+        name, _, lookup = key.partition("__")
+        if name not in field_names:
+            errors.append(f"`{name}` {INVALID_FILTER_FIELD_EXCEPTION_MESSAGE}")
+            continue
+        if (lookup or "exact") not in lookups:
+            errors.append(f"`{lookup}` {INVALID_FILTER_LOOKUP_EXCEPTION_MESSAGE}")
+            continue
+        try:
+            filters[key] = model._meta.get_field(name).to_python(value)
+        except DjangoValidationError as exc:
+            errors.extend(f"`{name}`: {message}" for message in exc.messages)
+    if errors:
+        raise serializers.ValidationError(errors)
+    return filters
+
+
+class TableCloneSerializer(serializers.Serializer):
+    """Copies the `table_structure` passed in the context to a new table"""
+
+    name = serializers.CharField(max_length=TABLE_FIELD_DEFAULT_STRING_LENGTH)
+    # {field name: value}, copy only the rows equal to all of them
+    filter = serializers.DictField(required=False, default=dict)
+    batch_size = serializers.IntegerField(min_value=1, default=CLONE_BATCH_SIZE)
+
+    def validate_name(self, value):
+        if TableStructure.objects.filter(name=value).exists():
+            raise TableAlreadyExistsException(f"`{value}` {TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE}")
+        return value
+
+    def validate_filter(self, value):
+        return validate_row_filter(get_dynamic_model(self.context["table_structure"].name), value)
+
+    def create(self, validated_data):
+        table_structure = self.context["table_structure"]
+        serializer = TableStructureSerializer(
+            data={
+                "name": validated_data["name"],
+                "field_definitions": list(
+                    table_structure.field_definitions.order_by("created").values("name", "type")
+                ),
+                "search_fields": table_structure.search_fields,
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        clone = serializer.save()
+        try:
+            # Number of copied rows, for the response
+            self.copied = copy_rows(
+                table_structure,
+                get_dynamic_model(table_structure.name),
+                get_dynamic_model(clone.name),
+                validated_data["filter"],
+                validated_data["batch_size"],
+            )
+        except Exception:
+            destroy_table(clone)
+            raise
+        return clone
+
+
+class ArchivalPolicySerializer(serializers.ModelSerializer):
+    """Sets the archival policy of the `table_structure` passed in the context"""
+
+    filter = serializers.DictField(allow_empty=False)
+
+    class Meta:
+        model = ArchivalPolicy
+        fields = ("filter", "created", "modified")
+        read_only_fields = ("created", "modified")
+
+    def validate_filter(self, value):
+        return validate_row_filter(
+            get_dynamic_model(self.context["table_structure"].name), value, ARCHIVE_FILTER_LOOKUPS
+        )
+
+    def create(self, validated_data):
+        policy, _ = ArchivalPolicy.objects.update_or_create(
+            table_structure=self.context["table_structure"], defaults=validated_data
+        )
+        return policy
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(
+        min_value=1, max_value=SEARCH_MAX_LIMIT, default=SEARCH_DEFAULT_LIMIT
+    )
+    offset = serializers.IntegerField(min_value=0, default=0)
+    explain = serializers.BooleanField(default=False)
+
+
+class RowsQuerySerializer(serializers.Serializer):
+    explain = serializers.BooleanField(default=False)
+    include_archived = serializers.BooleanField(default=False)
 
 
 def create_serializer1(model):
@@ -168,9 +454,10 @@ def create_serializer1(model):
     return serializer_class
 
 
+@timed("serializer")
 def create_serializer(model_name):
     # Get the model from all the Django app models
-    MODEL = apps.get_model(APP_NAME, model_name)
+    MODEL = get_dynamic_model(model_name)
 
     # Now we'll create a serializer dynamically
     class DynamicModelSerializer(serializers.ModelSerializer):
@@ -236,3 +523,15 @@ def custom_updater(
 
             items.append(item_)
     return items
+
+
+class SummaryQuerySerializer(serializers.Serializer):
+    explain = serializers.BooleanField(default=False)
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=CHANGES_MAX_LIMIT, default=CHANGES_DEFAULT_LIMIT
+    )
+    explain = serializers.BooleanField(default=False)
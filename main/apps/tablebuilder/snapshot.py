@@ -0,0 +1,99 @@
+"""Compiled schema snapshots.
+
+A snapshot is the compact, versioned form of every `TableStructure` and its `FieldDefinition`s
+plus a content hash, stored in a local file. Workers load it on startup instead of querying every
+structure, and rebuild it only when the schema stamp stored in it no longer matches the
+database (one aggregate query).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from django.db.models import Count, Max
+
+from main.apps.tablebuilder.constants import SCHEMA_SNAPSHOT_VERSION
+from main.apps.tablebuilder.models import TableStructure
+
+
+def schema_stamp():
+    """
+    :return: a string that changes whenever a structure or field definition is added, changed
+    or removed
+    """
+    stamp = TableStructure.objects.aggregate(
+        tables=Count("id", distinct=True),
+        fields=Count("field_definitions"),
+        tables_modified=Max("modified"),
+        fields_modified=Max("field_definitions__modified"),
+    )
+    return json.dumps(stamp, sort_keys=True, default=str)
+
+
+def build_schema():
+    """
+    :return: [[table name, [[field name, field type], ...]], ...] sorted by table name
+    """
+    queryset = TableStructure.objects.order_by("name").prefetch_related("field_definitions")
+    return [
+        [
+            table_structure.name,
+            [
+                [field.name, field.type]
+                for field in sorted(
+                    table_structure.field_definitions.all(), key=lambda field: field.created
+                )
+            ],
+        ]
+        for table_structure in queryset
+    ]
+
+
+def content_hash(tables):
+    return hashlib.sha256(json.dumps(tables, separators=(",", ":")).encode()).hexdigest()
+
+
+def read_snapshot(path):
+    """
+    :return: the snapshot dict, or None if the file is missing, corrupt or of another version
+    """
+    try:
+        with open(path, "rb") as file:
+            snapshot = json.loads(zlib.decompress(file.read()))
+    except (OSError, ValueError, zlib.error):
+        return None
+    if snapshot.get("version") != SCHEMA_SNAPSHOT_VERSION:
+        return None
+    if content_hash(snapshot.get("tables")) != snapshot.get("hash"):
+        return None
+    return snapshot
+
+
+def write_snapshot(path, stamp, tables):
+    snapshot = {
+        "version": SCHEMA_SNAPSHOT_VERSION,
+        "stamp": stamp,
+        "hash": content_hash(tables),
+        "tables": tables,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so concurrent workers never read a partial snapshot
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        file.write(zlib.compress(json.dumps(snapshot, separators=(",", ":")).encode()))
+    os.replace(file.name, path)
+    return snapshot
+
+
+def load_schema(path):
+    """
+    Load the schema from the snapshot at `path`, regenerating the file if it is stale.
+
+    :return: the same structure as `build_schema`
+    """
+    stamp = schema_stamp()
+    snapshot = read_snapshot(path)
+    if snapshot is None or snapshot["stamp"] != stamp:
+        snapshot = write_snapshot(path, stamp, build_schema())
+    return snapshot["tables"]
@@ -0,0 +1,107 @@
+"""Size and row count estimates of dynamic tables, without scanning them.
+
+PostgreSQL reads the planner statistics (`pg_class.reltuples`) and `pg_stat_user_tables`. SQLite
+reads `sqlite_stat1` when the table was analyzed, the largest rowid otherwise, and the page sizes
+from the `dbstat` virtual table when SQLite was compiled with it.
+"""
+from django.db import OperationalError, connection, transaction
+
+
+def _postgresql_stats(cursor, db_table):
+    relation = connection.ops.quote_name(db_table)
+    cursor.execute(
+        "SELECT c.reltuples::bigint, s.n_live_tup, pg_table_size(c.oid), "
+        "pg_total_relation_size(c.oid), s.last_vacuum, s.last_autovacuum, s.last_analyze, "
+        "s.last_autoanalyze "
+        "FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid "
+        "WHERE c.oid = %s::regclass",
+        [relation],
+    )
+    (
+        reltuples,
+        live_tuples,
+        table_bytes,
+        total_bytes,
+        last_vacuum,
+        last_autovacuum,
+        last_analyze,
+        last_autoanalyze,
+    ) = cursor.fetchone()
+    cursor.execute(
+        "SELECT i.relname, pg_relation_size(i.oid) "
+        "FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = %s::regclass ORDER BY i.relname",
+        [relation],
+    )
+    indexes = [{"name": name, "bytes": size} for name, size in cursor.fetchall()]
+    return {
+        # reltuples is -1 until the table is first vacuumed or analyzed
+        "estimated_rows": reltuples if reltuples >= 0 else live_tuples,
+        "table_bytes": table_bytes,
+        "indexes": indexes,
+        "total_bytes": total_bytes,
+        "last_vacuum": last_vacuum,
+        "last_autovacuum": last_autovacuum,
+        "last_analyze": last_analyze,
+        "last_autoanalyze": last_autoanalyze,
+    }
+
+
+def _sqlite_size(cursor, name):
+    try:
+        # A failing statement must not break the caller's transaction
+        with transaction.atomic():
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [name])
+            return cursor.fetchone()[0] or 0
+    except OperationalError:
+        # SQLite compiled without SQLITE_ENABLE_DBSTAT_VTAB
+        return None
+
+
+def _sqlite_stats(cursor, db_table):
+    estimated_rows = None
+    try:
+        with transaction.atomic():
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s ORDER BY idx IS NOT NULL LIMIT 1",
+                [db_table],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            estimated_rows = int(row[0].split()[0])
+    except OperationalError:
+        # sqlite_stat1 only exists once ANALYZE ran
+        pass
+    if estimated_rows is None:
+        cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(db_table)}")
+        estimated_rows = cursor.fetchone()[0] or 0
+
+    cursor.execute(f"PRAGMA index_list({connection.ops.quote_name(db_table)})")
+    index_names = sorted(row[1] for row in cursor.fetchall())
+    indexes = [{"name": name, "bytes": _sqlite_size(cursor, name)} for name in index_names]
+    table_bytes = _sqlite_size(cursor, db_table)
+    sizes = [table_bytes] + [index["bytes"] for index in indexes]
+    return {
+        "estimated_rows": estimated_rows,
+        "table_bytes": table_bytes,
+        "indexes": indexes,
+        "total_bytes": None if None in sizes else sum(sizes),
+        "last_vacuum": None,
+        "last_autovacuum": None,
+        "last_analyze": None,
+        "last_autoanalyze": None,
+    }
+
+
+def table_stats(model):
+    """
+    :return: estimated row count, on-disk sizes in bytes and maintenance times of the table of
+    `model`, sizes are None where the database can't report them
+    """
+    db_table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            stats = _postgresql_stats(cursor, db_table)
+        else:
+            stats = _sqlite_stats(cursor, db_table)
+    return {"table": db_table, "vendor": connection.vendor, **stats}
@@ -0,0 +1,231 @@
+"""Materialized group-by summaries of dynamic tables.
+
+Every `TableSummary` is stored in its own table with one row per group: the group-by columns,
+`row_count` and one `<function>_<field>` column per aggregate. Refreshing folds the rows inserted
+since `refreshed_seq` (from the `RowChange` log) into the existing groups with an upsert, so the
+cost scales with the churn instead of the table size. Updates and deletes fall back to a full
+rebuild, since min/max can't be reverted incrementally.
+"""
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
+from django.db.backends.utils import truncate_name
+from django.db.models import Max
+
+from main.apps.tablebuilder.changelog import (
+    change_log_enabled,
+    db_table_structure_id,
+    install_change_log,
+    remove_change_log,
+)
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import _get_field_class
+from main.apps.tablebuilder.instrumentation import timed
+from main.apps.tablebuilder.models import FieldDefinition, RowChange, TableSummary
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def summary_table_name(source_model, summary):
+    return truncate_name(
+        f"{source_model._meta.db_table}__{summary.name}", connection.ops.max_name_length()
+    )
+
+
+def aggregate_column(aggregate):
+    return f"{aggregate['function']}_{aggregate['field']}"
+
+
+def field_types(table_structure):
+    """
+    :return: {field name: field type} of the current schema of `table_structure`
+    """
+    return dict(
+        FieldDefinition.objects.filter(table_structure_id=table_structure.pk).values_list(
+            "name", "type"
+        )
+    )
+
+
+def summary_model(source_model, summary, types):
+    """
+    Build an unregistered model for the summary table of `summary`, in a throwaway app
+    registry so it never shows up among the dynamic models.
+
+    :param types: {field name: field type} of the source table
+    """
+
+    class Meta:
+        apps = Apps()
+        app_label = APP_NAME
+        db_table = summary_table_name(source_model, summary)
+        unique_together = [summary.group_by]
+
+    attrs = {"__module__": "main.apps.tablebuilder.models", "Meta": Meta}
+    for field_name in summary.group_by:
+        attrs[field_name] = _get_field_class(field_name, types[field_name])
+    attrs["row_count"] = models.BigIntegerField(default=0)
+    for aggregate in summary.aggregates:
+        attrs[aggregate_column(aggregate)] = models.BigIntegerField(null=True)
+    return type(f"{source_model.__name__}__{summary.name}", (models.Model,), attrs)
+
+
+@timed("schema_editor")
+def create_summary(source_model, summary):
+    """
+    Create the summary table and install the change log on the source table. The summary is
+    filled by the first refresh.
+    """
+    types = field_types(summary.table_structure)
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(summary_model(source_model, summary, types))
+    install_change_log(source_model, summary.table_structure)
+
+
+@timed("schema_editor")
+def drop_summary(source_model, summary):
+    """
+    Drop the summary table and delete `summary`, along with the change log if nothing else
+    reads it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {_qn(summary_table_name(source_model, summary))}")
+    summary.delete()
+    if not change_log_enabled(summary.table_structure):
+        remove_change_log(source_model)
+
+
+def _select(source_model, summary):
+    """
+    :return: (target columns, the SELECT list aggregating the source table)
+    """
+    columns = [_qn(name) for name in summary.group_by] + [_qn("row_count")]
+    select = [_qn(name) for name in summary.group_by] + ["COUNT(*)"]
+    for aggregate in summary.aggregates:
+        columns.append(_qn(aggregate_column(aggregate)))
+        select.append(f"{aggregate['function'].upper()}({_qn(aggregate['field'])})")
+    return ", ".join(columns), ", ".join(select)
+
+
+def _rebuild(cursor, source_model, summary):
+    table = _qn(summary_table_name(source_model, summary))
+    columns, select = _select(source_model, summary)
+    group_by = ", ".join(_qn(name) for name in summary.group_by)
+    cursor.execute(f"DELETE FROM {table}")
+    cursor.execute(
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT {select} FROM {_qn(source_model._meta.db_table)} GROUP BY {group_by}"
+    )
+
+
+def _fold_inserts(cursor, source_model, summary, table_structure_id, last_seq):
+    table = _qn(summary_table_name(source_model, summary))
+    columns, select = _select(source_model, summary)
+    group_by = ", ".join(_qn(name) for name in summary.group_by)
+    least, greatest = ("LEAST", "GREATEST") if connection.vendor == "postgresql" else ("MIN", "MAX")
+    combine = {
+        "sum": lambda column: f"{table}.{column} + excluded.{column}",
+        "min": lambda column: f"{least}({table}.{column}, excluded.{column})",
+        "max": lambda column: f"{greatest}({table}.{column}, excluded.{column})",
+    }
+    updates = [f"{_qn('row_count')} = {table}.{_qn('row_count')} + excluded.{_qn('row_count')}"]
+    for aggregate in summary.aggregates:
+        column = _qn(aggregate_column(aggregate))
+        updates.append(f"{column} = {combine[aggregate['function']](column)}")
+    cursor.execute(
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT {select} FROM {_qn(source_model._meta.db_table)} "
+        f"WHERE {_qn(source_model._meta.pk.column)} IN ("
+        f"SELECT row_id FROM {_qn(RowChange._meta.db_table)} "
+        "WHERE table_structure_id = %s AND seq > %s AND seq <= %s"
+        f") GROUP BY {group_by} "
+        f"ON CONFLICT ({group_by}) DO UPDATE SET {', '.join(updates)}",
+        [table_structure_id, summary.refreshed_seq, last_seq],
+    )
+
+
+def refresh_summary(source_model, summary):
+    """
+    Bring the summary table up to date with the source table.
+
+    :return: "none", "incremental" or "full"
+    """
+    changes = RowChange.objects.filter(table_structure_id=summary.table_structure_id)
+    if (
+        summary.refreshed_seq is not None
+        and not changes.filter(seq__gt=summary.refreshed_seq).exists()
+    ):
+        return "none"
+
+    with transaction.atomic():
+        # Concurrent refreshes queue on the summary row and fold from the `refreshed_seq` the
+        # previous one committed, `summary` may have been read before it
+        summary.refreshed_seq = (
+            TableSummary.objects.select_for_update().values_list("refreshed_seq", flat=True)
+        ).get(pk=summary.pk)
+        if connection.vendor == "postgresql":
+            # Wait for in-flight writes so no change below `last_seq` commits after the refresh
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {_qn(source_model._meta.db_table)} IN SHARE MODE")
+        last_seq = changes.aggregate(seq=Max("seq"))["seq"] or 0
+        if summary.refreshed_seq is not None and summary.refreshed_seq >= last_seq:
+            return "none"
+        pending = changes.filter(seq__gt=summary.refreshed_seq or 0, seq__lte=last_seq)
+        with connection.cursor() as cursor:
+            if (
+                summary.refreshed_seq is None
+                or pending.exclude(operation=RowChange.INSERT).exists()
+            ):
+                kind = "full"
+                _rebuild(cursor, source_model, summary)
+            else:
+                kind = "incremental"
+                _fold_inserts(
+                    cursor,
+                    source_model,
+                    summary,
+                    db_table_structure_id(summary.table_structure_id),
+                    last_seq,
+                )
+        summary.refreshed_seq = last_seq
+        summary.save(update_fields=["refreshed_seq", "modified"])
+    return kind
+
+
+def summary_rows(source_model, summary):
+    """
+    :return: a queryset of the summary rows ordered by the group-by fields
+    """
+    model = summary_model(source_model, summary, field_types(summary.table_structure))
+    return model.objects.order_by(*summary.group_by).values(
+        *summary.group_by,
+        "row_count",
+        *(aggregate_column(aggregate) for aggregate in summary.aggregates),
+    )
+
+
+def rebuild_summaries_after_schema_change(source_model, table_structure):
+    """
+    Recreate the summary tables of `table_structure` after its schema changed, dropping the
+    summaries that refer to removed fields or aggregate fields that are no longer numbers.
+    The recreated summaries are filled by their next refresh, the caller reinstalls the change
+    log.
+    """
+    summaries = list(table_structure.summaries.all())
+    if not summaries:
+        return
+    types = field_types(table_structure)
+    for summary in summaries:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {_qn(summary_table_name(source_model, summary))}")
+        if not (
+            all(name in types for name in summary.group_by)
+            and all(types.get(aggregate["field"]) == "number" for aggregate in summary.aggregates)
+        ):
+            summary.delete()
+            continue
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(summary_model(source_model, summary, types))
+        summary.refreshed_seq = None
+        summary.save(update_fields=["refreshed_seq", "modified"])
@@ -0,0 +1,182 @@
+"""Dropping and emptying dynamic tables.
+
+`destroy_table` drops a table with its summary tables and archive, unregisters its model and
+deletes its `TableStructure`; `truncate_table` empties it and deletes its archive. Both run
+under the schema lock of the table, so on PostgreSQL their DDL waits at most
+`TABLEBUILDER_DDL_LOCK_TIMEOUT` for other transactions.
+Tables estimated above `TABLEBUILDER_TEARDOWN_ASYNC_ROWS` rows aren't dropped in the request:
+they are renamed out of the way (truncate recreates an empty table in their place) and a
+`DbJobProcess` drops them later, see the `process_db_jobs` command.
+"""
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.backends.utils import truncate_name
+
+from main.apps.tablebuilder.archive import delete_archive
+from main.apps.tablebuilder.changelog import (
+    change_log_enabled,
+    install_change_log,
+    remove_change_log,
+)
+from main.apps.tablebuilder.helpers import (
+    create_db_table,
+    get_dynamic_model,
+    unregister_dynamic_model,
+)
+from main.apps.tablebuilder.instrumentation import timed
+from main.apps.tablebuilder.locks import set_ddl_timeouts, table_schema_lock
+from main.apps.tablebuilder.models import DbJobProcess, RowChange
+from main.apps.tablebuilder.search import disable_full_text_search, enable_full_text_search
+from main.apps.tablebuilder.stats import table_stats
+from main.apps.tablebuilder.summaries import (
+    rebuild_summaries_after_schema_change,
+    summary_table_name,
+)
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _deferred(model):
+    return (table_stats(model)["estimated_rows"] or 0) > settings.TABLEBUILDER_TEARDOWN_ASYNC_ROWS
+
+
+def _detach(model, table_structure):
+    """Remove the triggers and the search index, they refer to the table by name"""
+    remove_change_log(model)
+    if table_structure.search_fields:
+        disable_full_text_search(model)
+
+
+def _attach(model, table_structure):
+    if table_structure.search_fields:
+        enable_full_text_search(model, table_structure.search_fields)
+    if change_log_enabled(table_structure):
+        install_change_log(model, table_structure)
+
+
+def _defer_drop(cursor, db_table):
+    """Rename `db_table` and queue a job dropping it, freeing its name (and its index names)"""
+    suffix = f"__dropped_{uuid.uuid4().hex[:8]}"
+    max_length = connection.ops.max_name_length()
+    tombstone = db_table + suffix
+    if max_length:
+        tombstone = truncate_name(db_table, max_length - len(suffix)) + suffix
+    if connection.vendor == "postgresql":
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [_qn(db_table)],
+        )
+        (primary_key,) = cursor.fetchone()
+        cursor.execute(
+            f"ALTER INDEX {_qn(primary_key)} RENAME TO "
+            f"{_qn(truncate_name(f'{tombstone}_pkey', max_length))}"
+        )
+    cursor.execute(f"ALTER TABLE {_qn(db_table)} RENAME TO {_qn(tombstone)}")
+    DbJobProcess.objects.create(type=DbJobProcess.DROP_TABLE, name=tombstone)
+
+
+@timed("schema_editor")
+def destroy_table(table_structure):
+    """
+    :return: True if dropping the table was deferred to a background job
+    """
+    with transaction.atomic(), table_schema_lock(table_structure.pk):
+        model = get_dynamic_model(table_structure.name)
+        deferred = _deferred(model)
+        _detach(model, table_structure)
+        with connection.cursor() as cursor:
+            for summary in table_structure.summaries.all():
+                cursor.execute(f"DROP TABLE IF EXISTS {_qn(summary_table_name(model, summary))}")
+            if deferred:
+                _defer_drop(cursor, model._meta.db_table)
+            else:
+                cursor.execute(f"DROP TABLE {_qn(model._meta.db_table)}")
+        pk = table_structure.pk
+        table_structure.delete()
+        transaction.on_commit(lambda: delete_archive(pk))
+    unregister_dynamic_model(table_structure.name)
+    return deferred
+
+
+@timed("schema_editor")
+def truncate_table(table_structure):
+    """
+    Delete every row of the table, archived rows included. No row changes are logged: the
+    change log of the table is emptied and marked compacted, so change feed consumers resync,
+    and summaries are rebuilt on their next read.
+
+    :return: True if dropping the old rows was deferred to a background job
+    """
+    with transaction.atomic(), table_schema_lock(table_structure.pk):
+        model = get_dynamic_model(table_structure.name)
+        deferred = _deferred(model)
+        _detach(model, table_structure)
+        with connection.cursor() as cursor:
+            if deferred:
+                _defer_drop(cursor, model._meta.db_table)
+            elif connection.vendor == "postgresql":
+                cursor.execute(f"TRUNCATE {_qn(model._meta.db_table)}")
+            else:
+                cursor.execute(f"DELETE FROM {_qn(model._meta.db_table)}")
+        last_seq = RowChange.objects.aggregate(seq=Max("seq"))["seq"] or 0
+        RowChange.objects.filter(table_structure_id=table_structure.pk).delete()
+        if last_seq > table_structure.changes_compacted_seq:
+            table_structure.changes_compacted_seq = last_seq
+            table_structure.save(update_fields=["changes_compacted_seq", "modified"])
+        table_structure.archive_chunks.all().delete()
+        pk = table_structure.pk
+        transaction.on_commit(lambda: delete_archive(pk))
+        if deferred:
+            create_db_table(model)
+        _attach(model, table_structure)
+        rebuild_summaries_after_schema_change(model, table_structure)
+    return deferred
+
+
+def _is_virtual_table(db_table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [db_table])
+        row = cursor.fetchone()
+    return row is not None and row[0].upper().startswith("CREATE VIRTUAL")
+
+
+def drop_db_table(db_table, batch_size):
+    """
+    Drop a table no model refers to. On SQLite it is emptied first in batches of `batch_size`
+    rows, one transaction each, since dropping frees all its pages in a single write
+    transaction; PostgreSQL drops it without scanning it.
+    """
+    if connection.vendor != "postgresql" and not _is_virtual_table(db_table):
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {_qn(db_table)} WHERE rowid IN "
+                    f"(SELECT rowid FROM {_qn(db_table)} LIMIT %s)",
+                    [batch_size],
+                )
+                if cursor.rowcount < batch_size:
+                    break
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            set_ddl_timeouts(cursor)
+        cursor.execute(f"DROP TABLE IF EXISTS {_qn(db_table)}")
+
+
+def run_job(job, batch_size):
+    """Run a pending `DbJobProcess` claimed by the caller, recording its outcome"""
+    try:
+        if job.type == DbJobProcess.DROP_TABLE:
+            drop_db_table(job.name, batch_size)
+        else:
+            raise ValueError(f"Invalid job type: {job.type}")
+    except Exception as exc:
+        job.status = DbJobProcess.FAILED
+        job.error = str(exc)
+    else:
+        job.status = DbJobProcess.DONE
+    job.save(update_fields=["status", "error", "modified"])
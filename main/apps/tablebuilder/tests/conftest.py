@@ -3,6 +3,15 @@ from rest_framework.test import APIClient
 
 from main.apps.tablebuilder.factories import TableStructureFactory
 from main.apps.tablebuilder.models import FieldDefinition, TableStructure
+from main.apps.tablebuilder.teardown import destroy_table
+
+
+# drop the dynamic tables committed by transactional tests, the flush doesn't know them
+@pytest.fixture()
+def drop_dynamic_tables():
+    yield
+    for table_structure in TableStructure.objects.all():
+        destroy_table(table_structure)
 
 
 # configure the APIClient
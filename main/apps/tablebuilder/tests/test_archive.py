@@ -0,0 +1,133 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import INVALID_FILTER_LOOKUP_EXCEPTION_MESSAGE
+from main.apps.tablebuilder.models import ArchiveChunk
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+
+@pytest.fixture()
+def archive_dir(tmp_path, settings):
+    settings.TABLEBUILDER_ARCHIVE_DIR = str(tmp_path)
+    return tmp_path
+
+
+def _create_table(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    for i in range(5):
+        row = {"first_name": f"name-{i}", "last_name": "Stojanov", "phone_number": i}
+        api_client.post(f"{API_URL}{pk}/row/", row, format="json")
+    return pk
+
+
+def _phone_numbers(rows):
+    return sorted(row["phone_number"] for row in rows)
+
+
+def test_archive_rows(api_client, users_table_data, archive_dir):
+    # Arrange
+    pk = _create_table(api_client, users_table_data)
+    response = api_client.put(
+        f"{API_URL}{pk}/archival_policy/", {"filter": {"phone_number__lt": 3}}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    stdout = StringIO()
+    # Act
+    call_command("archive_rows", "--batch-size=2", stdout=stdout)
+    # Assert
+    assert "users: 3 rows in 2 chunks" in stdout.getvalue()
+    assert [chunk.rows for chunk in ArchiveChunk.objects.order_by("created")] == [2, 1]
+    assert len(list(archive_dir.glob(f"{pk}/*.jsonl.gz"))) == 2
+
+    response = api_client.get(f"{API_URL}{pk}/rows/")
+    assert _phone_numbers(response.data) == [3, 4]
+    response = api_client.get(f"{API_URL}{pk}/rows/", {"include_archived": "true"})
+    assert _phone_numbers(response.data) == [0, 1, 2, 3, 4]
+    (archived,) = [row for row in response.data if row["phone_number"] == 2]
+    assert archived == {
+        "id": archived["id"],
+        "first_name": "name-2",
+        "last_name": "Stojanov",
+        "phone_number": 2,
+        "subscriber": False,
+    }
+
+
+def test_archive_nothing_to_do(api_client, users_table_data, archive_dir):
+    pk = _create_table(api_client, users_table_data)
+    api_client.put(
+        f"{API_URL}{pk}/archival_policy/", {"filter": {"phone_number__gt": 10}}, format="json"
+    )
+    stdout = StringIO()
+
+    call_command("archive_rows", stdout=stdout)
+
+    assert stdout.getvalue() == "Archived 0 rows.\n"
+    assert not ArchiveChunk.objects.exists()
+
+
+def test_archival_policy_invalid_filter(api_client, users_table_data):
+    pk = _create_table(api_client, users_table_data)
+
+    response = api_client.put(
+        f"{API_URL}{pk}/archival_policy/", {"filter": {"phone_number__in": [1]}}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["filter"] == [f"`in` {INVALID_FILTER_LOOKUP_EXCEPTION_MESSAGE}"]
+
+
+def test_archival_policy_read_and_delete(api_client, users_table_data):
+    pk = _create_table(api_client, users_table_data)
+    url = f"{API_URL}{pk}/archival_policy/"
+    assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+    api_client.put(url, {"filter": {"subscriber": False}}, format="json")
+
+    response = api_client.get(url)
+
+    assert response.data["filter"] == {"subscriber": False}
+    assert api_client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+    assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_destroy_removes_archive(
+    api_client, users_table_data, archive_dir, django_capture_on_commit_callbacks
+):
+    pk = _create_table(api_client, users_table_data)
+    api_client.put(
+        f"{API_URL}{pk}/archival_policy/", {"filter": {"phone_number": 1}}, format="json"
+    )
+    call_command("archive_rows", stdout=StringIO())
+    assert (archive_dir / str(pk)).exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.delete(f"{API_URL}{pk}/")
+
+    assert not ArchiveChunk.objects.exists()
+    assert not (archive_dir / str(pk)).exists()
+
+
+def test_truncate_deletes_archive(
+    api_client, users_table_data, archive_dir, django_capture_on_commit_callbacks
+):
+    pk = _create_table(api_client, users_table_data)
+    api_client.put(
+        f"{API_URL}{pk}/archival_policy/", {"filter": {"phone_number__lt": 3}}, format="json"
+    )
+    call_command("archive_rows", stdout=StringIO())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(f"{API_URL}{pk}/truncate/")
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not ArchiveChunk.objects.exists()
+    assert not (archive_dir / str(pk)).exists()
+    response = api_client.get(f"{API_URL}{pk}/rows/", {"include_archived": "true"})
+    assert response.data == []
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+from rest_framework import status
+
+from main.apps.tablebuilder.changelog import read_changes
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.models import RowChange, TableStructure
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROW = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1, "subscriber": True}
+
+
+def _create_table_with_feed(api_client, users_table_data):
+    users_table_data["change_feed"] = True
+    response = api_client.post(API_URL, users_table_data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def test_changes(api_client, users_table_data):
+    # Arrange
+    pk = _create_table_with_feed(api_client, users_table_data)
+    row_id = api_client.post(f"{API_URL}{pk}/row/", ROW, format="json").data
+    model = get_dynamic_model(users_table_data["name"])
+    model.objects.filter(pk=row_id).update(phone_number=2)
+    model.objects.filter(pk=row_id).delete()
+    # Act
+    response = api_client.get(f"{API_URL}{pk}/changes/")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert [change["operation"] for change in response.data["results"]] == ["I", "U", "D"]
+    assert all(change["row_id"] == row_id for change in response.data["results"])
+    assert response.data["results"][0]["row"] is None
+    assert response.data["has_more"] is False
+
+
+def test_changes_since(api_client, users_table_data):
+    pk = _create_table_with_feed(api_client, users_table_data)
+    for phone_number in range(3):
+        api_client.post(f"{API_URL}{pk}/row/", {**ROW, "phone_number": phone_number}, format="json")
+
+    first = api_client.get(f"{API_URL}{pk}/changes/", {"limit": 2}).data
+    second = api_client.get(f"{API_URL}{pk}/changes/", {"since": first["last_seq"]}).data
+
+    assert first["has_more"] is True
+    assert [change["row"]["phone_number"] for change in first["results"]] == [0, 1]
+    assert [change["row"]["phone_number"] for change in second["results"]] == [2]
+    assert second["has_more"] is False
+
+
+def test_changes_not_enabled(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+
+    response = api_client.get(f"{API_URL}{pk}/changes/")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not RowChange.objects.filter(table_structure_id=pk).exists()
+
+
+def test_compact_row_changes(api_client, users_table_data):
+    pk = _create_table_with_feed(api_client, users_table_data)
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+    stdout = StringIO()
+
+    call_command("compact_row_changes", "--retention-days=0", stdout=stdout)
+
+    assert "Compacted 1 row changes." in stdout.getvalue()
+    assert not RowChange.objects.filter(table_structure_id=pk).exists()
+    response = api_client.get(f"{API_URL}{pk}/changes/")
+    assert response.status_code == status.HTTP_410_GONE
+    assert response.data["last_seq"] == TableStructure.objects.get(pk=pk).changes_compacted_seq
+
+
+def test_compact_row_changes_keeps_unrefreshed_summary_changes(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    summary = {"name": "by_subscriber", "group_by": ["subscriber"]}
+    api_client.post(f"{API_URL}{pk}/summaries/", summary, format="json")
+    api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+
+    call_command("compact_row_changes", stdout=StringIO())
+
+    assert RowChange.objects.filter(table_structure_id=pk).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_wait_for_writes_in_flight(api_client, users_table_data, drop_dynamic_tables):
+    # Arrange
+    pk = _create_table_with_feed(api_client, users_table_data)
+    model = get_dynamic_model(users_table_data["name"])
+    columns = ", ".join(connection.ops.quote_name(name) for name in ["id", *ROW])
+    other = connections.create_connection("default")
+    with other.cursor() as cursor:
+        # Takes the lower seq but commits after the next insert
+        cursor.execute("BEGIN")
+        cursor.execute(
+            f"INSERT INTO {model._meta.db_table} ({columns}) VALUES (%s, %s, %s, %s, %s)",
+            [uuid.uuid4(), *ROW.values()],
+        )
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+    result = []
+
+    def read():
+        try:
+            result.extend(read_changes(model, TableStructure.objects.get(pk=pk), 0, 10)[0])
+        finally:
+            connection.close()
+
+    reader = threading.Thread(target=read)
+    # Act
+    reader.start()
+    time.sleep(0.2)
+    with other.cursor() as cursor:
+        cursor.execute("COMMIT")
+    other.close()
+    reader.join()
+    # Assert
+    seqs = [change.seq for change, row in result]
+    assert len(seqs) == 2
+    assert seqs == sorted(seqs)
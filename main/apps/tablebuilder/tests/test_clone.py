@@ -0,0 +1,99 @@
+import pytest
+from django.apps import apps
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import (
+    APP_NAME,
+    INVALID_FILTER_FIELD_EXCEPTION_MESSAGE,
+    TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE,
+)
+from main.apps.tablebuilder.models import TableStructure
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROWS = [
+    {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1, "subscriber": True},
+    {"first_name": "Ana", "last_name": "Mite", "phone_number": 2},
+    {"first_name": "Ana", "last_name": "Petrova", "phone_number": 3, "subscriber": True},
+]
+
+
+def _create_table(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    for row in ROWS:
+        api_client.post(f"{API_URL}{pk}/row/", row, format="json")
+    return pk
+
+
+def _rows(name):
+    model = apps.get_model(APP_NAME, name)
+    return sorted(model.objects.values_list("id", "first_name", "phone_number", "subscriber"))
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_clone(api_client, users_table_data, batch_size):
+    # Arrange
+    pk = _create_table(api_client, users_table_data)
+    # Act
+    response = api_client.post(
+        f"{API_URL}{pk}/clone/", {"name": "users_copy", "batch_size": batch_size}, format="json"
+    )
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["rows"] == 3
+    clone = TableStructure.objects.get(pk=response.data["id"])
+    assert clone.fingerprint == TableStructure.objects.get(pk=pk).fingerprint
+    assert _rows("users_copy") == _rows("users")
+
+
+def test_clone_with_filter(api_client, users_table_data):
+    pk = _create_table(api_client, users_table_data)
+
+    response = api_client.post(
+        f"{API_URL}{pk}/clone/",
+        {"name": "users_copy", "filter": {"first_name": "Ana", "subscriber": True}},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["rows"] == 1
+    assert [row[2] for row in _rows("users_copy")] == [3]
+
+
+def test_clone_keeps_search(api_client, users_table_data):
+    users_table_data["search_fields"] = ["last_name"]
+    pk = _create_table(api_client, users_table_data)
+
+    clone_pk = api_client.post(f"{API_URL}{pk}/clone/", {"name": "users_copy"}, format="json").data[
+        "id"
+    ]
+    response = api_client.get(f"{API_URL}{clone_pk}/search/", {"q": "petrova"})
+
+    assert [row["phone_number"] for row in response.data["results"]] == [3]
+
+
+def test_clone_with_invalid_filter(api_client, users_table_data):
+    pk = _create_table(api_client, users_table_data)
+
+    response = api_client.post(
+        f"{API_URL}{pk}/clone/",
+        {"name": "users_copy", "filter": {"email": "x", "phone_number": "abc"}},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["filter"][0] == f"`email` {INVALID_FILTER_FIELD_EXCEPTION_MESSAGE}"
+    assert response.data["filter"][1].startswith("`phone_number`")
+    assert not TableStructure.objects.filter(name="users_copy").exists()
+
+
+def test_clone_to_existing_name(api_client, users_table_data):
+    pk = _create_table(api_client, users_table_data)
+
+    response = api_client.post(f"{API_URL}{pk}/clone/", {"name": "users"}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE in str(response.data["name"][0])
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from main.apps.tablebuilder import helpers
+from main.apps.tablebuilder.helpers import warm_tables, warm_tables_on_server_start
+from main.apps.tablebuilder.models import TableStructure
+
+pytestmark = pytest.mark.django_db
+
+
+def test_bench_tablebuilder(tmp_path, settings):
+    settings.ALLOWED_HOSTS = ["localhost"]
+    output = tmp_path / "bench.json"
+    stdout = StringIO()
+
+    call_command(
+        "bench_tablebuilder",
+        "--repeat=1",
+        "--fields=3",
+        "--update-fields=2",
+        "--startup-tables=2",
+        "--inserts=2",
+        "--validations=10",
+        "--read-sizes",
+        "1",
+        "5",
+        f"--output={output}",
+        stdout=stdout,
+    )
+
+    results = json.loads(output.read_text())
+    assert results == json.loads(stdout.getvalue())
+    assert results["meta"]["vendor"] == "postgresql"
+    assert results["create_table"]["runs"] == 1
+    assert [item["fields"] for item in results["update_schema"]] == [2]
+    assert results["row_insert"]["runs"] == 2
+    assert results["row_validation"]["rows"] == 10
+    assert [item["rows"] for item in results["rows_read"]] == [1, 5]
+    assert not TableStructure.objects.filter(name__startswith="bench_").exists()
+
+
+def test_warm_tables(populated_tablebuilder_db):
+    stdout = StringIO()
+
+    call_command("warm_tables", stdout=stdout)
+
+    assert "Registered 2 dynamic models" in stdout.getvalue()
+    assert warm_tables(force=True) is True
+    assert warm_tables() is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warm_tables_on_server_start_in_event_loop(
+    populated_tablebuilder_db, drop_dynamic_tables, monkeypatch
+):
+    monkeypatch.setattr(helpers, "_tables_warmed", False)
+
+    async def import_application():
+        warm_tables_on_server_start()
+
+    asyncio.run(import_application())
+
+    assert helpers._tables_warmed is True
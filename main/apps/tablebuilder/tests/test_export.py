@@ -0,0 +1,79 @@
+import csv
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from main.apps.tablebuilder.helpers import get_dynamic_model
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+
+@pytest.fixture()
+def users_table(api_client, users_table_data):
+    api_client.post(API_URL, users_table_data, format="json")
+    model = get_dynamic_model(users_table_data["name"])
+    model.objects.bulk_create(
+        [
+            model(
+                first_name=f"first-{i}",
+                last_name=f"last-{i}",
+                phone_number=i,
+                subscriber=i % 2 == 0,
+            )
+            for i in range(5)
+        ]
+    )
+    return model
+
+
+def test_export_tables_csv(users_table, tmp_path):
+    call_command(
+        "export_tables",
+        "users",
+        f"--output-dir={tmp_path}",
+        "--format=csv",
+        "--workers=1",
+        "--chunk-size=2",
+        "--rows-per-file=3",
+        stdout=StringIO(),
+    )
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["tables"][0]["rows"] == 5
+    assert manifest["tables"][0]["files"] == [
+        "users/part-00000.csv.gz",
+        "users/part-00001.csv.gz",
+    ]
+    rows = []
+    for part in manifest["tables"][0]["files"]:
+        with gzip.open(tmp_path / part, "rt") as file:
+            rows += list(csv.DictReader(file))
+    assert sorted(int(row["phone_number"]) for row in rows) == list(range(5))
+    schema = json.loads((tmp_path / "users" / "schema.json").read_text())
+    assert {"name": "phone_number", "type": "number"} in schema["fields"]
+
+
+def test_export_tables_parquet(users_table, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    call_command(
+        "export_tables",
+        "users",
+        f"--output-dir={tmp_path}",
+        "--format=parquet",
+        "--workers=1",
+        "--chunk-size=2",
+        stdout=StringIO(),
+    )
+
+    parquet_file = pq.ParquetFile(tmp_path / "users.parquet")
+    assert parquet_file.metadata.num_rows == 5
+    assert parquet_file.metadata.num_row_groups == 3
+    assert str(parquet_file.schema_arrow.field("phone_number").type) == "int32"
+    assert str(parquet_file.schema_arrow.field("subscriber").type) == "bool"
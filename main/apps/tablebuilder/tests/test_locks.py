@@ -0,0 +1,129 @@
+import pytest
+from django.apps import apps
+from django.db import connections
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.instrumentation import track_request
+from main.apps.tablebuilder.locks import advisory_lock_key
+from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.serializers import TableStructureSerializer
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+
+@pytest.fixture()
+def other_connection():
+    connection = connections.create_connection("default")
+    yield connection
+    connection.close()
+
+
+def test_update_fails_fast_when_table_is_locked(
+    api_client, users_table_data, other_connection, settings
+):
+    # Arrange
+    settings.TABLEBUILDER_DDL_LOCK_TIMEOUT = 0.1
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    with other_connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [advisory_lock_key(pk)])
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+    # Act
+    response = api_client.put(f"{API_URL}{pk}/", changed, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_update_of_another_table_is_not_blocked(
+    api_client, users_table_data, user_logins_table, other_connection, settings
+):
+    settings.TABLEBUILDER_DDL_LOCK_TIMEOUT = 0.1
+    users_pk = api_client.post(API_URL, users_table_data, format="json").data
+    logins_pk = api_client.post(API_URL, user_logins_table, format="json").data
+    with other_connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [advisory_lock_key(users_pk)])
+    changed = {
+        "name": user_logins_table["name"],
+        "field_definitions": user_logins_table["field_definitions"]
+        + [{"name": "ip", "type": "string"}],
+    }
+
+    response = api_client.put(f"{API_URL}{logins_pk}/", changed, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_update_refreshes_only_its_model(api_client, users_table_data, user_logins_table):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    api_client.post(API_URL, user_logins_table, format="json")
+    logins_model = apps.get_model(APP_NAME, user_logins_table["name"])
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+
+    response = api_client.put(f"{API_URL}{pk}/", changed, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert apps.get_model(APP_NAME, user_logins_table["name"]) is logins_model
+    users_model = apps.get_model(APP_NAME, users_table_data["name"])
+    assert "email" in [field.name for field in users_model._meta.fields]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("lock_timeout, statement_timeout", [(0.1, 60), (0, 0.1)])
+def test_update_fails_fast_when_ddl_waits(
+    api_client,
+    users_table_data,
+    other_connection,
+    drop_dynamic_tables,
+    settings,
+    lock_timeout,
+    statement_timeout,
+):
+    # Arrange
+    settings.TABLEBUILDER_DDL_LOCK_TIMEOUT = lock_timeout
+    settings.TABLEBUILDER_DDL_STATEMENT_TIMEOUT = statement_timeout
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    with other_connection.cursor() as cursor:
+        cursor.execute("BEGIN")
+        cursor.execute("LOCK TABLE tablebuilder_users IN ACCESS SHARE MODE")
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+    # Act
+    response = api_client.put(f"{API_URL}{pk}/", changed, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_409_CONFLICT
+    with other_connection.cursor() as cursor:
+        cursor.execute("ROLLBACK")
+
+
+def test_update_rechecks_schema_under_lock(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    stale = TableStructure.objects.get(pk=pk)
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+    api_client.put(f"{API_URL}{pk}/", changed, format="json")
+    serializer = TableStructureSerializer(stale, data=changed)
+    serializer.is_valid(raise_exception=True)
+
+    with track_request() as stats:
+        serializer.save()
+
+    # Nothing to reconcile, the model isn't rebuilt either
+    assert stats.calls == {}
+    assert stale.fingerprint == TableStructure.objects.get(pk=pk).fingerprint
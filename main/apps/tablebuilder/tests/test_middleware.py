@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework import status
+
+from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
+from main.apps.tablebuilder.middleware import QueryInstrumentationMiddleware
+from main.apps.tablebuilder.models import TableStructure
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+
+def test_instrumentation_headers(api_client, populated_tablebuilder_db):
+    reload_app_models()
+    generate_tables_on_startup()
+    # Arrange
+    obj = TableStructure.objects.get(name="users")
+    row_data = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1}
+    # Act
+    response = api_client.post(f"{API_URL}{obj.id}/row/", row_data, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert int(response["X-Query-Count"]) >= 2
+    assert float(response["X-DB-Time-Ms"]) > 0
+    assert float(response["X-Serializer-Time-Ms"]) > 0
+    assert response["X-Model-Registry-Hits"] == "1"
+    assert response["X-Model-Registry-Misses"] == "0"
+    assert response["X-Schema-Editor-Calls"] == "0"
+
+
+def test_instrumentation_schema_editor_calls(api_client, users_table_data):
+    response = api_client.post(API_URL, users_table_data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Schema-Editor-Calls"] == "1"
+    assert float(response["X-Schema-Editor-Time-Ms"]) > 0
+
+
+def test_slow_request_log(api_client, settings, caplog):
+    settings.TABLEBUILDER_SLOW_REQUEST_MS = 0.001
+
+    with caplog.at_level(logging.WARNING, logger="main.apps.tablebuilder.middleware"):
+        response = api_client.get(API_URL)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Slow request GET /api/table/" in caplog.text
+    assert "tablebuilder_tablestructure" in caplog.text
+
+
+def test_instrumentation_async():
+    async def get_response(request):
+        await sync_to_async(TableStructure.objects.count)()
+        return HttpResponse()
+
+    middleware = QueryInstrumentationMiddleware(get_response)
+
+    response = async_to_sync(middleware)(RequestFactory().get(API_URL))
+
+    assert iscoroutinefunction(middleware)
+    assert response["X-Query-Count"] == "1"
+    assert float(response["X-DB-Time-Ms"]) > 0
@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+from rest_framework import status
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROW = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1}
+
+
+@pytest.fixture()
+def slow_query_log(tmp_path, monkeypatch):
+    """Point the slow-query log file handler to a temporary file"""
+    path = tmp_path / "slow_queries.log"
+    (handler,) = logging.getLogger("main.apps.tablebuilder.querylog").handlers
+    handler.close()
+    monkeypatch.setattr(handler, "baseFilename", str(path))
+    yield path
+    handler.close()
+
+
+def test_rows_explain(api_client, users_table_data):
+    # Arrange
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+    # Act
+    response = api_client.get(f"{API_URL}{pk}/rows/", {"explain": "true"})
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert "tablebuilder_users" in response.data["plan"]
+    assert "actual time" not in response.data["plan"]
+
+
+def test_rows_explain_analyze_for_staff(api_client, users_table_data, django_user_model):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    staff = django_user_model.objects.create_user("staff", is_staff=True)
+    api_client.force_authenticate(user=staff)
+
+    response = api_client.get(f"{API_URL}{pk}/rows/", {"explain": "true"})
+
+    assert "actual time" in response.data["plan"]
+
+
+@pytest.mark.parametrize("analyze", [False, True])
+def test_search_explain(api_client, users_table_data, settings, analyze):
+    settings.TABLEBUILDER_EXPLAIN_ANALYZE = analyze
+    users_table_data["search_fields"] = ["first_name"]
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+
+    response = api_client.get(f"{API_URL}{pk}/search/", {"q": "mite", "explain": "true"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert ("actual time" in response.data["plan"]) == analyze
+
+
+def test_slow_query_logged(api_client, users_table_data, settings, slow_query_log):
+    settings.TABLEBUILDER_SLOW_QUERY_MS = 0.001
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+
+    response = api_client.get(f"{API_URL}{pk}/rows/")
+
+    assert response.status_code == status.HTTP_200_OK
+    log = slow_query_log.read_text()
+    assert "Slow query on users (rows)" in log
+    assert "Seq Scan on tablebuilder_users" in log
+
+
+def test_fast_query_not_logged(api_client, users_table_data, settings, slow_query_log):
+    settings.TABLEBUILDER_SLOW_QUERY_MS = 60_000
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+
+    api_client.get(f"{API_URL}{pk}/rows/")
+
+    assert not slow_query_log.exists()
+
+
+def test_summary_and_changes_explain(api_client, users_table_data):
+    users_table_data["change_feed"] = True
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    api_client.post(
+        f"{API_URL}{pk}/summaries/", {"name": "by_name", "group_by": ["first_name"]}, format="json"
+    )
+
+    summary = api_client.get(f"{API_URL}{pk}/summaries/by_name/", {"explain": "true"})
+    changes = api_client.get(f"{API_URL}{pk}/changes/", {"explain": "true"})
+
+    assert "tablebuilder_users__by_name" in summary.data["plan"]
+    assert "tablebuilder_rowchange" in changes.data["plan"]
+
+
+def test_slow_summary_and_changes_logged(api_client, users_table_data, settings, slow_query_log):
+    settings.TABLEBUILDER_SLOW_QUERY_MS = 0.001
+    users_table_data["change_feed"] = True
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    api_client.post(
+        f"{API_URL}{pk}/summaries/", {"name": "by_name", "group_by": ["first_name"]}, format="json"
+    )
+
+    api_client.get(f"{API_URL}{pk}/summaries/by_name/")
+    api_client.get(f"{API_URL}{pk}/changes/")
+
+    log = slow_query_log.read_text()
+    assert "Slow query on users (summary)" in log
+    assert "Slow query on users (changes)" in log
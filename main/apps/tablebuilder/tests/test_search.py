@@ -0,0 +1,84 @@
+import pytest
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import FULL_TEXT_SEARCH_NOT_ENABLED_EXCEPTION_MESSAGE
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROWS = [
+    {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1},
+    {"first_name": "Ana", "last_name": "Mite", "phone_number": 2},
+    {"first_name": "Ana", "last_name": "Petrova", "phone_number": 3},
+]
+
+
+def _create_searchable_table(api_client, users_table_data):
+    users_table_data["search_fields"] = ["first_name", "last_name"]
+    response = api_client.post(API_URL, users_table_data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    for row in ROWS:
+        api_client.post(f"{API_URL}{response.data}/row/", row, format="json")
+    return response.data
+
+
+def test_search(api_client, users_table_data):
+    # Arrange
+    pk = _create_searchable_table(api_client, users_table_data)
+    # Act
+    response = api_client.get(f"{API_URL}{pk}/search/", {"q": "mite"})
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 2
+    assert {row["phone_number"] for row in response.data["results"]} == {1, 2}
+    assert all("rank" in row for row in response.data["results"])
+
+
+def test_search_pagination(api_client, users_table_data):
+    pk = _create_searchable_table(api_client, users_table_data)
+
+    response = api_client.get(f"{API_URL}{pk}/search/", {"q": "ana", "limit": 1, "offset": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 2
+    assert len(response.data["results"]) == 1
+
+
+def test_search_after_schema_update(api_client, users_table_data):
+    users_table_data["search_fields"] = ["first_name", "last_name"]
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+        "search_fields": ["last_name", "email"],
+    }
+
+    response = api_client.put(f"{API_URL}{pk}/", changed, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    for row in ROWS:
+        api_client.post(f"{API_URL}{pk}/row/", {**row, "email": "x@y.z"}, format="json")
+    response = api_client.get(f"{API_URL}{pk}/search/", {"q": "mite"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [row["phone_number"] for row in response.data["results"]] == [2]
+
+
+def test_search_not_enabled(api_client, users_table_data):
+    response = api_client.post(API_URL, users_table_data, format="json")
+
+    response = api_client.get(f"{API_URL}{response.data}/search/", {"q": "mite"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert FULL_TEXT_SEARCH_NOT_ENABLED_EXCEPTION_MESSAGE in str(response.data[0])
+
+
+def test_create_with_non_string_search_field(api_client, users_table_data):
+    users_table_data["search_fields"] = ["phone_number"]
+
+    response = api_client.post(API_URL, users_table_data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "search_fields" in response.data
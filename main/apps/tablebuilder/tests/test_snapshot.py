@@ -0,0 +1,48 @@
+import pytest
+from django.apps import apps
+
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
+from main.apps.tablebuilder.snapshot import read_snapshot
+from main.apps.tablebuilder.tests.conftest import create_new_field_definition
+
+pytestmark = pytest.mark.django_db
+
+
+def test_generate_tables_from_snapshot(
+    populated_tablebuilder_db, django_assert_num_queries, tmp_path
+):
+    path = tmp_path / "schema.snapshot"
+    reload_app_models()
+    # Arrange: the first start compiles the snapshot
+    generate_tables_on_startup(snapshot_path=path)
+    snapshot = read_snapshot(path)
+    assert [name for name, _ in snapshot["tables"]] == ["user_logins", "users"]
+    reload_app_models()
+
+    # Act: the next start reads it back with the table list and the stamp query only
+    with django_assert_num_queries(2):
+        generate_tables_on_startup(snapshot_path=path)
+
+    # Assert
+    model = apps.get_model(APP_NAME, "users")
+    assert [field.name for field in model._meta.fields] == [
+        "id",
+        "first_name",
+        "last_name",
+        "phone_number",
+        "subscriber",
+    ]
+
+
+def test_snapshot_regenerated_on_schema_change(populated_tablebuilder_db, tmp_path):
+    path = tmp_path / "schema.snapshot"
+    reload_app_models()
+    generate_tables_on_startup(snapshot_path=path)
+    old_hash = read_snapshot(path)["hash"]
+
+    create_new_field_definition("email", "string", None, populated_tablebuilder_db[1])
+    generate_tables_on_startup(snapshot_path=path)
+
+    assert read_snapshot(path)["hash"] != old_hash
+    assert "email" in [field.name for field in apps.get_model(APP_NAME, "user_logins")._meta.fields]
@@ -0,0 +1,41 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+
+from main.apps.tablebuilder.helpers import get_dynamic_model
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+
+def test_stats(api_client, users_table_data):
+    # Arrange
+    cache.clear()
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    model = get_dynamic_model(users_table_data["name"])
+    model.objects.bulk_create(
+        [model(first_name="a", last_name="b", phone_number=i) for i in range(10)]
+    )
+    # Act
+    response = api_client.get(f"{API_URL}{pk}/stats/")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["table"] == model._meta.db_table
+    assert response.data["estimated_rows"] >= 0
+    assert response.data["table_bytes"] > 0
+    assert response.data["total_bytes"] >= response.data["table_bytes"]
+    assert [index["name"] for index in response.data["indexes"]] == [f"{model._meta.db_table}_pkey"]
+
+
+def test_stats_are_cached(api_client, users_table_data):
+    cache.clear()
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    first = api_client.get(f"{API_URL}{pk}/stats/")
+
+    second = api_client.get(f"{API_URL}{pk}/stats/")
+
+    assert second.data == first.data
+    # Only get_object, the stats come from the cache
+    assert second["X-Query-Count"] == "1"
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from rest_framework import status
+
+from main.apps.tablebuilder import summaries
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.models import RowChange, TableSummary
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROWS = [
+    {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1, "subscriber": True},
+    {"first_name": "Ana", "last_name": "Petrova", "phone_number": 5, "subscriber": True},
+    {"first_name": "Ana", "last_name": "Stojanov", "phone_number": 3, "subscriber": False},
+]
+
+SUMMARY = {
+    "name": "by_subscriber",
+    "group_by": ["subscriber"],
+    "aggregates": [
+        {"field": "phone_number", "function": "sum"},
+        {"field": "phone_number", "function": "max"},
+    ],
+}
+
+
+def _create_table_with_summary(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    for row in ROWS[:2]:
+        api_client.post(f"{API_URL}{pk}/row/", row, format="json")
+    response = api_client.post(f"{API_URL}{pk}/summaries/", SUMMARY, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    return pk
+
+
+def test_summary(api_client, users_table_data):
+    # Arrange
+    pk = _create_table_with_summary(api_client, users_table_data)
+    # Act
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["refresh"] == "full"
+    assert response.data["results"] == [
+        {"subscriber": True, "row_count": 2, "sum_phone_number": 6, "max_phone_number": 5}
+    ]
+
+
+def test_summary_incremental_refresh(api_client, users_table_data):
+    pk = _create_table_with_summary(api_client, users_table_data)
+    api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+
+    api_client.post(f"{API_URL}{pk}/row/", ROWS[2], format="json")
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+
+    assert response.data["refresh"] == "incremental"
+    assert response.data["results"] == [
+        {"subscriber": False, "row_count": 1, "sum_phone_number": 3, "max_phone_number": 3},
+        {"subscriber": True, "row_count": 2, "sum_phone_number": 6, "max_phone_number": 5},
+    ]
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    assert response.data["refresh"] == "none"
+
+
+def test_summary_full_refresh_after_delete(api_client, users_table_data):
+    pk = _create_table_with_summary(api_client, users_table_data)
+    api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+
+    get_dynamic_model(users_table_data["name"]).objects.filter(phone_number=5).delete()
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+
+    assert RowChange.objects.filter(table_structure_id=pk, operation=RowChange.DELETE).exists()
+    assert response.data["refresh"] == "full"
+    assert response.data["results"] == [
+        {"subscriber": True, "row_count": 1, "sum_phone_number": 1, "max_phone_number": 1}
+    ]
+
+
+def test_list_and_drop_summary(api_client, users_table_data):
+    pk = _create_table_with_summary(api_client, users_table_data)
+
+    response = api_client.get(f"{API_URL}{pk}/summaries/")
+    assert [summary["name"] for summary in response.data] == ["by_subscriber"]
+    response = api_client.delete(f"{API_URL}{pk}/summaries/by_subscriber/")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_summary_with_invalid_fields(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    invalid = {
+        "name": "invalid",
+        "group_by": ["missing"],
+        "aggregates": [{"field": "first_name", "function": "sum"}],
+    }
+
+    response = api_client.post(f"{API_URL}{pk}/summaries/", invalid, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {"group_by", "aggregates"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_refreshes_fold_inserts_once(
+    api_client, users_table_data, drop_dynamic_tables, monkeypatch
+):
+    # Arrange
+    pk = _create_table_with_summary(api_client, users_table_data)
+    api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    api_client.post(f"{API_URL}{pk}/row/", ROWS[2], format="json")
+    model = get_dynamic_model(users_table_data["name"])
+    stale = [TableSummary.objects.get(table_structure_id=pk) for _ in range(2)]
+    fold_inserts = summaries._fold_inserts
+
+    def slow_fold_inserts(*args):
+        fold_inserts(*args)
+        time.sleep(0.2)
+
+    monkeypatch.setattr(summaries, "_fold_inserts", slow_fold_inserts)
+    kinds = []
+
+    def refresh(summary):
+        try:
+            kinds.append(summaries.refresh_summary(model, summary))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=refresh, args=(summary,)) for summary in stale]
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Assert
+    assert sorted(kinds) == ["incremental", "none"]
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_subscriber/")
+    assert response.data["results"][0] == {
+        "subscriber": False,
+        "row_count": 1,
+        "sum_phone_number": 3,
+        "max_phone_number": 3,
+    }
@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.models import DbJobProcess, RowChange, TableStructure
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+ROW = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1}
+
+
+def _create_table(api_client, users_table_data, **options):
+    pk = api_client.post(API_URL, {**users_table_data, **options}, format="json").data
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+    return pk
+
+
+def _table_names():
+    return connection.introspection.table_names()
+
+
+def test_destroy(api_client, users_table_data):
+    # Arrange
+    pk = _create_table(api_client, users_table_data)
+    # Act
+    response = api_client.delete(f"{API_URL}{pk}/")
+    # Assert
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not TableStructure.objects.filter(pk=pk).exists()
+    assert "tablebuilder_users" not in _table_names()
+    assert "users" not in apps.all_models[APP_NAME]
+    assert not DbJobProcess.objects.exists()
+
+
+def test_destroy_deferred(api_client, users_table_data, settings):
+    settings.TABLEBUILDER_TEARDOWN_ASYNC_ROWS = -1
+    pk = _create_table(api_client, users_table_data, search_fields=["first_name"])
+
+    response = api_client.delete(f"{API_URL}{pk}/")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = DbJobProcess.objects.get()
+    assert job.status == DbJobProcess.PENDING
+    assert job.name in _table_names()
+    # The name and the index names are free again
+    _create_table(api_client, users_table_data, search_fields=["first_name"])
+    assert "tablebuilder_users" in _table_names()
+
+    call_command("process_db_jobs", stdout=StringIO())
+
+    job.refresh_from_db()
+    assert job.status == DbJobProcess.DONE
+    assert job.name not in _table_names()
+
+
+@pytest.mark.parametrize("async_rows", [100000, -1])
+def test_truncate(api_client, users_table_data, settings, async_rows):
+    settings.TABLEBUILDER_TEARDOWN_ASYNC_ROWS = async_rows
+    pk = _create_table(api_client, users_table_data, search_fields=["last_name"])
+    api_client.post(
+        f"{API_URL}{pk}/summaries/",
+        {"name": "by_name", "group_by": ["first_name"]},
+        format="json",
+    )
+    api_client.get(f"{API_URL}{pk}/summaries/by_name/")
+
+    response = api_client.post(f"{API_URL}{pk}/truncate/")
+
+    assert response.status_code == (
+        status.HTTP_202_ACCEPTED if async_rows < 0 else status.HTTP_204_NO_CONTENT
+    )
+    assert DbJobProcess.objects.exists() == (async_rows < 0)
+    assert api_client.get(f"{API_URL}{pk}/rows/").data == []
+    assert api_client.get(f"{API_URL}{pk}/summaries/by_name/").data["results"] == []
+    api_client.post(f"{API_URL}{pk}/row/", {**ROW, "last_name": "Petrova"}, format="json")
+    response = api_client.get(f"{API_URL}{pk}/search/", {"q": "petrova"})
+    assert response.data["count"] == 1
+    response = api_client.get(f"{API_URL}{pk}/summaries/by_name/")
+    assert response.data["results"] == [{"first_name": "Mite", "row_count": 1}]
+
+
+def test_truncate_resyncs_change_feed(api_client, users_table_data):
+    # Arrange
+    pk = _create_table(api_client, users_table_data, change_feed=True)
+    last_seq = api_client.get(f"{API_URL}{pk}/changes/").data["last_seq"]
+    # Act
+    api_client.post(f"{API_URL}{pk}/truncate/")
+    # Assert
+    assert not RowChange.objects.filter(table_structure_id=pk).exists()
+    response = api_client.get(f"{API_URL}{pk}/changes/", {"since": last_seq - 1})
+    assert response.status_code == status.HTTP_410_GONE
+    assert response.data["last_seq"] == last_seq
+    api_client.post(f"{API_URL}{pk}/row/", ROW, format="json")
+    response = api_client.get(f"{API_URL}{pk}/changes/", {"since": last_seq})
+    assert [change["operation"] for change in response.data["results"]] == ["I"]
+
+
+def test_reap_orphan_tables(api_client, users_table_data):
+    _create_table(api_client, users_table_data)
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE tablebuilder_orphan (id integer)")
+    stdout = StringIO()
+
+    call_command("reap_orphan_tables", stdout=stdout)
+
+    assert stdout.getvalue().splitlines() == [
+        "tablebuilder_orphan",
+        "1 orphan tables, run with --drop to drop them.",
+    ]
+    assert "tablebuilder_orphan" in _table_names()
+
+    call_command("reap_orphan_tables", "--drop", stdout=StringIO())
+
+    assert "tablebuilder_orphan" not in _table_names()
+    assert "tablebuilder_users" in _table_names()
@@ -0,0 +1,71 @@
+import pytest
+from rest_framework import serializers, status
+
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.serializers import create_serializer
+from main.apps.tablebuilder.validators import get_row_validator
+
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/table/"
+
+VALID = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1, "subscriber": True}
+
+PAYLOADS = [
+    VALID,
+    {**VALID, "first_name": "  Mite  ", "phone_number": "42", "subscriber": "yes"},
+    {**VALID, "phone_number": 7.0, "unknown": 1},
+    {key: value for key, value in VALID.items() if key != "subscriber"},
+    {"first_name": "Mite"},
+    {**VALID, "first_name": "", "last_name": None},
+    {**VALID, "first_name": "x" * 101, "last_name": "a\x00b"},
+    {**VALID, "first_name": True, "last_name": ["Stojanov"]},
+    {**VALID, "phone_number": 2**31, "subscriber": "maybe"},
+    {**VALID, "phone_number": "12a", "subscriber": None},
+    [VALID],
+    "Mite",
+]
+
+
+def _validate(validate, data):
+    try:
+        return "valid", validate(data)
+    except serializers.ValidationError as error:
+        return "invalid", error.detail
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_matches_model_serializer(api_client, users_table_data, data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    table_structure = TableStructure.objects.get(pk=pk)
+    model = get_dynamic_model(table_structure.name)
+
+    def serialize(data):
+        serializer = create_serializer(table_structure.name)(data=data)
+        serializer.is_valid(raise_exception=True)
+        return dict(serializer.validated_data)
+
+    assert _validate(get_row_validator(table_structure, model).validate, data) == _validate(
+        serialize, data
+    )
+
+
+def test_recompiled_after_schema_update(api_client, users_table_data):
+    pk = api_client.post(API_URL, users_table_data, format="json").data
+    # Compiles the validator without inserting a row, the new field can't be added to a
+    # non-empty table
+    response = api_client.post(f"{API_URL}{pk}/row/", {}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+    api_client.put(f"{API_URL}{pk}/", changed, format="json")
+
+    response = api_client.post(f"{API_URL}{pk}/row/", VALID, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data == {"email": ["This field is required."]}
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.test import AsyncClient
+from rest_framework import status
+
+from main.apps.tablebuilder import views
+from main.apps.tablebuilder.constants import APP_NAME
+from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
+from main.apps.tablebuilder.models import TableStructure
+
+# AsyncClient is driven through async_to_sync from the test thread, so the views' thread
+# sensitive ORM calls run back on that thread and see the test transaction.
+pytestmark = pytest.mark.django_db
+
+
+API_URL = "/api/async/table/"
+
+
+@pytest.fixture()
+def async_client():
+    return AsyncClient()
+
+
+def _stream_json(response):
+    async def consume():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    return json.loads(async_to_sync(consume)())
+
+
+def test_async_add_rows(async_client, populated_tablebuilder_db):
+    reload_app_models()
+    generate_tables_on_startup()
+    # Arrange
+    obj = TableStructure.objects.get(name="users")
+    url = f"{API_URL}{obj.id}/row/"
+    row_data = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1}
+    # Act
+    single = async_to_sync(async_client.post)(url, row_data, content_type="application/json")
+    bulk = async_to_sync(async_client.post)(
+        url, [row_data, {**row_data, "phone_number": 2}], content_type="application/json"
+    )
+    invalid = async_to_sync(async_client.post)(
+        url, {**row_data, "phone_number": "abc"}, content_type="application/json"
+    )
+    # Assert
+    assert single.status_code == status.HTTP_200_OK
+    assert bulk.status_code == status.HTTP_200_OK
+    assert len(bulk.json()) == 2
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert "phone_number" in invalid.json()
+    model = apps.get_model(APP_NAME, obj.name)
+    assert model.objects.count() == 3
+
+
+def test_async_get_rows(async_client, populated_tablebuilder_db):
+    reload_app_models()
+    generate_tables_on_startup()
+    # Arrange
+    obj = TableStructure.objects.get(name="users")
+    model = apps.get_model(APP_NAME, obj.name)
+    model.objects.bulk_create(
+        [model(first_name=f"name{i}", last_name="x", phone_number=i) for i in range(3)]
+    )
+    # Act
+    response = async_to_sync(async_client.get)(f"{API_URL}{obj.id}/rows/")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    rows = _stream_json(response)
+    assert sorted(row["phone_number"] for row in rows) == [0, 1, 2]
+
+
+def test_async_get_rows_in_chunks(async_client, populated_tablebuilder_db, monkeypatch):
+    reload_app_models()
+    generate_tables_on_startup()
+    monkeypatch.setattr(views, "ASYNC_ROWS_CHUNK_SIZE", 2)
+    obj = TableStructure.objects.get(name="users")
+    model = apps.get_model(APP_NAME, obj.name)
+    model.objects.bulk_create(
+        [model(first_name=f"name{i}", last_name="x", phone_number=i) for i in range(4)]
+    )
+
+    response = async_to_sync(async_client.get)(f"{API_URL}{obj.id}/rows/")
+
+    rows = _stream_json(response)
+    assert sorted(row["phone_number"] for row in rows) == [0, 1, 2, 3]
+    assert len({row["id"] for row in rows}) == 4
+
+
+def test_async_rows_unknown_table(async_client):
+    response = async_to_sync(async_client.get)(
+        f"{API_URL}00000000-0000-0000-0000-000000000000/rows/"
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_metrics(api_client, populated_tablebuilder_db):
+    reload_app_models()
+    generate_tables_on_startup()
+    obj = TableStructure.objects.get(name="users")
+    api_client.get(f"/api/table/{obj.id}/rows/")
+
+    response = api_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/plain")
+    body = response.content.decode()
+    assert 'tablebuilder_request_latency_seconds_count{action="rows"}' in body
+    assert 'tablebuilder_rows_read_total{action="rows"}' in body
+    assert "tablebuilder_startup_registration_seconds_count" in body
+    assert "tablebuilder_registered_models 2.0" in body
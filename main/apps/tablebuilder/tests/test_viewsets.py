@@ -3,8 +3,9 @@ from django.apps import apps
 from rest_framework import status
 
 from main.apps.tablebuilder.constants import APP_NAME, TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE
+from main.apps.tablebuilder.factories import TableStructureFactory
 from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
-from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.models import FieldDefinition, TableStructure
 
 pytestmark = pytest.mark.django_db
 
@@ -83,9 +84,6 @@ def test_update(api_client, users_table_update_data, populated_tablebuilder_db):
     # Ensure the response contains the primary key of the created object
     created_object = TableStructure.objects.get(pk=response.data)
     assert created_object is not None
-    import pdb
-
-    pdb.set_trace()
 
 
 def test_add_row(api_client, populated_tablebuilder_db):
@@ -161,3 +159,97 @@ def test_generate_tables(populated_tablebuilder_db):
         raise exc
 
     assert model.__name__ == "users"
+
+
+def test_update_with_unchanged_schema(api_client, users_table_data):
+    # Arrange
+    response = api_client.post(API_URL, users_table_data, format="json")
+    url = f"{API_URL}{response.data}/"
+    resubmitted = {
+        "name": users_table_data["name"],
+        "field_definitions": list(reversed(users_table_data["field_definitions"])),
+    }
+    # Act
+    response = api_client.put(url, resubmitted, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Schema-Editor-Calls"] == "0"
+    assert response["X-Model-Registry-Hits"] == "0"
+    # get_object plus the savepoint around the (short-circuited) atomic update
+    assert int(response["X-Query-Count"]) <= 3
+
+
+def test_update_with_changed_schema_updates_fingerprint(api_client, users_table_data):
+    # Arrange
+    response = api_client.post(API_URL, users_table_data, format="json")
+    obj = TableStructure.objects.get(pk=response.data)
+    old_fingerprint = obj.fingerprint
+    changed = {
+        "name": users_table_data["name"],
+        "field_definitions": users_table_data["field_definitions"]
+        + [{"name": "email", "type": "string"}],
+    }
+    # Act
+    response = api_client.put(f"{API_URL}{obj.id}/", changed, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Schema-Editor-Calls"] == "1"
+    obj.refresh_from_db()
+    assert obj.fingerprint not in ("", old_fingerprint)
+
+
+@pytest.mark.parametrize("count", [1, 10])
+def test_list_query_count(api_client, count, django_assert_num_queries):
+    # Arrange
+    for i in range(count):
+        table_structure = TableStructureFactory.create(name=f"table_{i}")
+        FieldDefinition.objects.create(
+            name="first_name", type="string", table_structure=table_structure
+        )
+        FieldDefinition.objects.create(
+            name="phone_number", type="number", table_structure=table_structure
+        )
+    # Act: count, page of structures, their field definitions
+    with django_assert_num_queries(3):
+        response = api_client.get(API_URL)
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == count
+    assert [field["name"] for field in response.data["results"][0]["field_definitions"]] == [
+        "first_name",
+        "phone_number",
+    ]
+
+
+def test_retrieve(api_client, populated_tablebuilder_db):
+    obj = populated_tablebuilder_db[0]
+
+    response = api_client.get(f"{API_URL}{obj.id}/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["name"] == obj.name
+    assert len(response.data["field_definitions"]) == 4
+
+
+def test_update_swapping_field_names(api_client, users_table_data):
+    # Arrange
+    response = api_client.post(API_URL, users_table_data, format="json")
+    url = f"{API_URL}{response.data}/"
+    row = {"first_name": "Mite", "last_name": "Stojanov", "phone_number": 1}
+    api_client.post(f"{url}row/", row, format="json")
+    swapped = {
+        "name": users_table_data["name"],
+        "field_definitions": [
+            {"name": "first_name", "type": "string", "old_name": "last_name"},
+            {"name": "last_name", "type": "string", "old_name": "first_name"},
+            {"name": "phone_number", "type": "number"},
+            {"name": "subscriber", "type": "boolean"},
+        ],
+    }
+    # Act
+    response = api_client.put(url, swapped, format="json")
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Schema-Editor-Calls"] != "0"
+    (stored,) = api_client.get(f"{url}rows/").data
+    assert (stored["first_name"], stored["last_name"]) == ("Stojanov", "Mite")
@@ -1,9 +1,14 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from main.apps.tablebuilder.views import AsyncRowsView, AsyncRowView
 from main.apps.tablebuilder.viewsets import TableBuilderViewSet
 
 
 router = DefaultRouter()
 router.register("table", TableBuilderViewSet, basename="")
 
-urlpatterns = router.urls + []
+urlpatterns = router.urls + [
+    path("async/table/<uuid:pk>/row/", AsyncRowView.as_view(), name="async-row"),
+    path("async/table/<uuid:pk>/rows/", AsyncRowsView.as_view(), name="async-rows"),
+]
@@ -0,0 +1,109 @@
+"""Compiled row validators for the single-row write path.
+
+A `RowValidator` is built once per table schema version (`TableStructure.fingerprint`) from the
+fields of the table's model. Well-typed input - str within the length limit, int within the
+column range, bool - is checked and coerced by a flat loop, without instantiating a serializer.
+Anything else (strings that need coercion, missing required fields, invalid values) falls back to
+the DRF ModelSerializer, so the coerced values and the error shapes are exactly DRF's.
+"""
+import re
+import threading
+from collections.abc import Mapping
+
+from django.db import connection, models
+from rest_framework import serializers
+
+from main.apps.tablebuilder.constants import ROW_VALIDATOR_CACHE_SIZE
+
+STRING = "string"
+NUMBER = "number"
+BOOLEAN = "boolean"
+
+# Characters DRF's CharField rejects (null and surrogates)
+_PROHIBITED_CHARACTERS = re.compile("[\x00\ud800-\udfff]")
+
+
+class RowValidator:
+    def __init__(self, model):
+        class Meta:
+            fields = "__all__"
+
+        Meta.model = model
+        self.serializer_class = type(
+            f"{model.__name__}RowSerializer", (serializers.ModelSerializer,), {"Meta": Meta}
+        )
+        self.fields = []
+        # Fields of another type always take the serializer path
+        self.compiled = True
+        for field in model._meta.concrete_fields:
+            if not field.editable:
+                continue
+            if isinstance(field, models.BooleanField):
+                self.fields.append((field.name, BOOLEAN, None, None))
+            elif isinstance(field, models.IntegerField):
+                low, high = connection.ops.integer_field_range(field.get_internal_type())
+                self.fields.append((field.name, NUMBER, low, high))
+            elif isinstance(field, models.CharField):
+                self.fields.append((field.name, STRING, None, field.max_length))
+            else:
+                self.compiled = False
+
+    def _coerce(self, data):
+        """
+        :return: the validated values, or None if `data` needs the serializer
+        """
+        if not self.compiled or not isinstance(data, Mapping):
+            return None
+        values = {}
+        for name, kind, low, high in self.fields:
+            if name not in data:
+                if kind == BOOLEAN:
+                    # Not required, the model default applies
+                    continue
+                return None
+            value = data[name]
+            value_type = type(value)
+            if kind == STRING:
+                if value_type is not str:
+                    return None
+                value = value.strip()
+                if not value or len(value) > high or _PROHIBITED_CHARACTERS.search(value):
+                    return None
+            elif kind == NUMBER:
+                if value_type is not int or not low <= value <= high:
+                    return None
+            elif value_type is not bool:
+                return None
+            values[name] = value
+        return values
+
+    def validate(self, data):
+        """
+        :return: the values to create a row from
+        :raises ValidationError: with the same detail as the ModelSerializer of the table
+        """
+        values = self._coerce(data)
+        if values is None:
+            serializer = self.serializer_class(data=data)
+            serializer.is_valid(raise_exception=True)
+            values = dict(serializer.validated_data)
+        return values
+
+
+_row_validators = {}
+_row_validators_lock = threading.Lock()
+
+
+def get_row_validator(table_structure, model):
+    """
+    :return: the RowValidator of the current schema version of `table_structure`
+    """
+    key = (table_structure.pk, table_structure.fingerprint, model)
+    validator = _row_validators.get(key)
+    if validator is None:
+        with _row_validators_lock:
+            if len(_row_validators) >= ROW_VALIDATOR_CACHE_SIZE:
+                # Evict the oldest entry, dicts keep insertion order
+                _row_validators.pop(next(iter(_row_validators)))
+            validator = _row_validators[key] = RowValidator(model)
+    return validator
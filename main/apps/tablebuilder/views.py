@@ -0,0 +1,157 @@
+"""Plain Django views: the async (ASGI) row endpoints and the metrics endpoint.
+
+The async row endpoints mirror the `row` and `rows` actions of `TableBuilderViewSet` but run on
+Django's async ORM, so a slow rows query or a slow client does not tie up a
+worker thread when served through `main.asgi.application`.
+
+Under ASGI every request runs its queries on a thread of its own, so on a connection of its own:
+at most `TABLEBUILDER_ASYNC_DB_CONNECTIONS` requests of a process hold one at a time, released
+after each step instead of while a client reads the response.
+"""
+import asyncio
+import json
+import weakref
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+
+from main.apps.tablebuilder.constants import ASYNC_ROWS_CHUNK_SIZE
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.metrics import ROWS_READ, ROWS_WRITTEN, render_metrics
+from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.serializers import create_serializer
+
+
+_db_semaphores = weakref.WeakKeyDictionary()
+
+
+def _release_connection():
+    # Tests run the views inside their transaction
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+@asynccontextmanager
+async def _db_slot():
+    loop = asyncio.get_running_loop()
+    if loop not in _db_semaphores:
+        _db_semaphores[loop] = asyncio.Semaphore(settings.TABLEBUILDER_ASYNC_DB_CONNECTIONS)
+    async with _db_semaphores[loop]:
+        try:
+            yield
+        finally:
+            await sync_to_async(_release_connection)()
+
+
+async def _get_table_model(pk):
+    try:
+        table_structure = await TableStructure.objects.aget(pk=pk)
+    except TableStructure.DoesNotExist as exc:
+        raise Http404 from exc
+    try:
+        model = get_dynamic_model(table_structure.name)
+    except LookupError as exc:
+        raise Http404 from exc
+    return table_structure, model
+
+
+def _validate(serializer_class, data, many):
+    serializer = serializer_class(data=data, many=many)
+    return serializer, serializer.is_valid()
+
+
+def _dump_rows(serializer, instances):
+    # One dumps call for the whole chunk, without the brackets of the list
+    rows = [serializer.to_representation(instance) for instance in instances]
+    return json.dumps(rows, cls=DjangoJSONEncoder)[1:-1]
+
+
+async def _fetch_chunk(queryset):
+    return [instance async for instance in queryset[:ASYNC_ROWS_CHUNK_SIZE]]
+
+
+class AsyncTableView(View):
+    """Base view for the async row endpoints"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Same as DRF's APIView: the API does not use session authentication
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+
+class AsyncRowView(AsyncTableView):
+    """Insert one row (object payload) or many rows (list payload)"""
+
+    async def post(self, request, pk):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+
+        async with _db_slot():
+            return await self._insert(pk, data)
+
+    async def _insert(self, pk, data):
+        table_structure, model = await _get_table_model(pk)
+        many = isinstance(data, list)
+        # DRF validation is synchronous and may query the database (e.g. unique validators)
+        serializer, valid = await sync_to_async(_validate)(
+            create_serializer(table_structure.name), data, many
+        )
+        if not valid:
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST, safe=False)
+
+        if many:
+            instances = await model.objects.abulk_create(
+                [model(**values) for values in serializer.validated_data]
+            )
+            ROWS_WRITTEN.labels("async_row").inc(len(instances))
+            return JsonResponse([instance.pk for instance in instances], safe=False)
+
+        instance = await model.objects.acreate(**serializer.validated_data)
+        ROWS_WRITTEN.labels("async_row").inc()
+        return JsonResponse(instance.pk, safe=False)
+
+
+class AsyncRowsView(AsyncTableView):
+    """Stream all rows of a table as a JSON array"""
+
+    async def get(self, request, pk):
+        async with _db_slot():
+            table_structure, model = await _get_table_model(pk)
+            rows = model.objects.order_by("pk")
+            first = await _fetch_chunk(rows)
+        serializer = create_serializer(table_structure.name)()
+
+        async def stream():
+            # Keyset pagination, a server-side cursor would keep the connection for the whole
+            # response
+            yield "["
+            separator = ""
+            instances = first
+            while True:
+                if instances:
+                    yield separator + await sync_to_async(_dump_rows)(serializer, instances)
+                    ROWS_READ.labels("async_rows").inc(len(instances))
+                    separator = ","
+                if len(instances) < ASYNC_ROWS_CHUNK_SIZE:
+                    break
+                async with _db_slot():
+                    instances = await _fetch_chunk(rows.filter(pk__gt=instances[-1].pk))
+            yield "]"
+
+        return StreamingHttpResponse(stream(), content_type="application/json")
+
+
+def metrics(request):
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
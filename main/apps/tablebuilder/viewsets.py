@@ -1,19 +1,55 @@
 """REST"""
+import time
+
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from main.apps.tablebuilder.constants import APP_NAME, TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE
-from main.apps.tablebuilder.exceptions import TableAlreadyExistsException
-from main.apps.tablebuilder.models import TableStructure
+from main.apps.tablebuilder.archive import read_archived_rows
+from main.apps.tablebuilder.changelog import changes_page, read_changes
+from main.apps.tablebuilder.constants import (
+    APP_NAME,
+    CHANGE_FEED_NOT_ENABLED_EXCEPTION_MESSAGE,
+    CHANGES_COMPACTED_EXCEPTION_MESSAGE,
+    FULL_TEXT_SEARCH_NOT_ENABLED_EXCEPTION_MESSAGE,
+    TABLE_ALREADY_EXISTS_EXCEPTION_MESSAGE,
+)
+from main.apps.tablebuilder.exceptions import (
+    ChangeFeedNotEnabledException,
+    FullTextSearchNotEnabledException,
+    TableAlreadyExistsException,
+)
+from main.apps.tablebuilder.helpers import get_dynamic_model
+from main.apps.tablebuilder.instrumentation import timer
+from main.apps.tablebuilder.metrics import REQUEST_LATENCY, ROWS_READ, ROWS_WRITTEN
+from main.apps.tablebuilder.models import ArchivalPolicy, FieldDefinition, TableStructure
+from main.apps.tablebuilder.pagination import TableStructurePagination
+from main.apps.tablebuilder.querylog import explain_queryset, explain_sql, observe_query
+from main.apps.tablebuilder.search import search_rows, search_sql
+from main.apps.tablebuilder.stats import table_stats
 from main.apps.tablebuilder.serializers import (
+    ArchivalPolicySerializer,
+    ChangesQuerySerializer,
+    RowsQuerySerializer,
+    SearchQuerySerializer,
+    SummaryQuerySerializer,
+    TableCloneSerializer,
     TableDefinitionReadOnlySerializer,
+    TableStructureListSerializer,
     TableStructureSerializer,
+    TableSummarySerializer,
     create_serializer,
 )
+from main.apps.tablebuilder.summaries import drop_summary, refresh_summary, summary_rows
+from main.apps.tablebuilder.teardown import destroy_table, truncate_table
+from main.apps.tablebuilder.validators import get_row_validator
 
 
 class TableBuilderViewSet(viewsets.ModelViewSet):
@@ -21,6 +57,35 @@ class TableBuilderViewSet(viewsets.ModelViewSet):
 
     queryset = TableStructure.objects.all()
     serializer_class = TableStructureSerializer
+    pagination_class = TableStructurePagination
+
+    def get_queryset(self):
+        if self.action in ("list", "retrieve"):
+            return TableStructure.objects.order_by("name").prefetch_related(
+                Prefetch(
+                    "field_definitions",
+                    queryset=FieldDefinition.objects.order_by("created").only(
+                        "id", "name", "type", "table_structure_id"
+                    ),
+                )
+            )
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return TableStructureListSerializer
+        return super().get_serializer_class()
+
+    def explain_analyze(self):
+        """ANALYZE executes the query, only staff users get it unless it is enabled for all"""
+        return settings.TABLEBUILDER_EXPLAIN_ANALYZE or self.request.user.is_staff
+
+    def dispatch(self, request, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            REQUEST_LATENCY.labels(self.action or "unknown").observe(time.perf_counter() - start)
 
     def create(self, request: Request) -> Response:
         """"""
@@ -61,19 +126,220 @@ class TableBuilderViewSet(viewsets.ModelViewSet):
 
         return Response(status=status.HTTP_200_OK, data=pk)
 
+    def destroy(self, request: Request, pk=None) -> Response:
+        """Drop the table, 202 when the drop of its rows was deferred to a background job"""
+        obj = self.get_object()
+        deferred = destroy_table(obj)
+        cache.delete(f"tablebuilder:stats:{obj.pk}")
+
+        return Response(status=status.HTTP_202_ACCEPTED if deferred else status.HTTP_204_NO_CONTENT)
+
+    @action(methods=["post"], detail=True)
+    def truncate(self, request: Request, pk=None) -> Response:
+        """Delete every row of the table, 202 when the drop of the old rows was deferred"""
+        obj = self.get_object()
+        deferred = truncate_table(obj)
+        cache.delete(f"tablebuilder:stats:{obj.pk}")
+
+        return Response(status=status.HTTP_202_ACCEPTED if deferred else status.HTTP_204_NO_CONTENT)
+
     @action(methods=["post"], detail=True)
     def row(self, request: Request, pk=None) -> Response:
         obj = self.get_object()
-        # model = apps.get_model(APP_NAME, obj.name)
-        s = create_serializer(obj.name)(data=request.data)
-        s.is_valid(raise_exception=True)
-        saved_data = s.save()
-        return Response(status=status.HTTP_200_OK, data=saved_data.pk)
+        model = get_dynamic_model(obj.name)
+        with timer("serializer"):
+            values = get_row_validator(obj, model).validate(request.data)
+        row = model(**values)
+        row.save()
+        ROWS_WRITTEN.labels("row").inc()
+        return Response(status=status.HTTP_200_OK, data=row.pk)
+
+    @action(methods=["post"], detail=True)
+    def clone(self, request: Request, pk=None) -> Response:
+        """Copy the table's schema and (optionally filtered) rows to a new table"""
+        obj = self.get_object()
+        serializer = TableCloneSerializer(data=request.data, context={"table_structure": obj})
+        serializer.is_valid(raise_exception=True)
+        clone = serializer.save()
+        ROWS_WRITTEN.labels("clone").inc(serializer.copied)
+
+        return Response({"id": clone.pk, "rows": serializer.copied}, status=status.HTTP_200_OK)
 
     @action(methods=["get"], detail=True)
     def rows(self, request: Request, pk=None) -> Response:
         obj = self.get_object()
-        model = apps.get_model(APP_NAME, obj.name)
-        serialized = create_serializer(obj.name)(model.objects.all(), many=True)
+        params = RowsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        model = get_dynamic_model(obj.name)
+        queryset = model.objects.all()
+        if params.validated_data["explain"]:
+            return Response(
+                {"plan": explain_queryset(queryset, analyze=self.explain_analyze())},
+                status=status.HTTP_200_OK,
+            )
+        with observe_query(obj.name, "rows", lambda: explain_queryset(queryset)):
+            rows = list(queryset)
+        serialized = create_serializer(obj.name)(rows, many=True)
+        with timer("serializer"):
+            data = serialized.data
+        if params.validated_data["include_archived"]:
+            field_names = [
+                field.name for field in model._meta.concrete_fields if not field.primary_key
+            ]
+            data = list(data) + list(read_archived_rows(obj, field_names))
+        ROWS_READ.labels("rows").inc(len(data))
+
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(methods=["get", "put", "delete"], detail=True)
+    def archival_policy(self, request: Request, pk=None) -> Response:
+        """Read, set or remove the filter of the rows the `archive_rows` command archives"""
+        obj = self.get_object()
+        if request.method == "PUT":
+            serializer = ArchivalPolicySerializer(
+                data=request.data, context={"table_structure": obj}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        policy = get_object_or_404(ArchivalPolicy, table_structure=obj)
+        if request.method == "DELETE":
+            policy.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(ArchivalPolicySerializer(policy).data, status=status.HTTP_200_OK)
+
+    @action(methods=["get"], detail=True)
+    def search(self, request: Request, pk=None) -> Response:
+        """Full-text search over the table's `search_fields`, best matches first"""
+        obj = self.get_object()
+        if not obj.search_fields:
+            raise FullTextSearchNotEnabledException(FULL_TEXT_SEARCH_NOT_ENABLED_EXCEPTION_MESSAGE)
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        model = get_dynamic_model(obj.name)
+        query = [
+            model,
+            params.validated_data["q"],
+            params.validated_data["limit"],
+            params.validated_data["offset"],
+        ]
+        if params.validated_data["explain"]:
+            _, page_query = search_sql(*query)
+            return Response(
+                {"plan": explain_sql(*page_query, analyze=self.explain_analyze())},
+                status=status.HTTP_200_OK,
+            )
+        with observe_query(obj.name, "search", lambda: explain_sql(*search_sql(*query)[1])):
+            count, hits = search_rows(*query)
+        serialized = create_serializer(obj.name)(hits, many=True)
+        with timer("serializer"):
+            results = [{**row, "rank": hit.rank} for row, hit in zip(serialized.data, hits)]
+        ROWS_READ.labels("search").inc(len(results))
+
+        return Response({"count": count, "results": results}, status=status.HTTP_200_OK)
+
+    @action(methods=["get", "post"], detail=True)
+    def summaries(self, request: Request, pk=None) -> Response:
+        """List the table's summaries, or declare a new one"""
+        obj = self.get_object()
+        if request.method == "POST":
+            serializer = TableSummarySerializer(data=request.data, context={"table_structure": obj})
+            serializer.is_valid(raise_exception=True)
+            summary = serializer.save()
+            return Response(status=status.HTTP_200_OK, data=summary.pk)
+
+        serializer = TableSummarySerializer(obj.summaries.order_by("name"), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(methods=["get", "delete"], detail=True, url_path=r"summaries/(?P<summary_name>\w+)")
+    def summary(self, request: Request, pk=None, summary_name=None) -> Response:
+        """Read a summary, folding in the rows changed since its last refresh, or drop it"""
+        obj = self.get_object()
+        summary = get_object_or_404(obj.summaries, name=summary_name)
+        model = get_dynamic_model(obj.name)
+        if request.method == "DELETE":
+            drop_summary(model, summary)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        params = SummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = summary_rows(model, summary)
+        if params.validated_data["explain"]:
+            return Response(
+                {"plan": explain_queryset(rows, analyze=self.explain_analyze())},
+                status=status.HTTP_200_OK,
+            )
+        refresh = refresh_summary(model, summary)
+        with observe_query(obj.name, "summary", lambda: explain_queryset(rows)):
+            results = list(rows)
+        ROWS_READ.labels("summary").inc(len(results))
+
+        return Response({"refresh": refresh, "results": results}, status=status.HTTP_200_OK)
+
+    @action(methods=["get"], detail=True)
+    def changes(self, request: Request, pk=None) -> Response:
+        """Row changes after the `since` sequence, resume from the returned `last_seq`"""
+        obj = self.get_object()
+        if not obj.change_feed:
+            raise ChangeFeedNotEnabledException(CHANGE_FEED_NOT_ENABLED_EXCEPTION_MESSAGE)
+        params = ChangesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        since = params.validated_data["since"]
+        limit = params.validated_data["limit"]
+        if params.validated_data["explain"]:
+            return Response(
+                {
+                    "plan": explain_queryset(
+                        changes_page(obj, since, limit), analyze=self.explain_analyze()
+                    )
+                },
+                status=status.HTTP_200_OK,
+            )
+        if since < obj.changes_compacted_seq:
+            return Response(
+                {
+                    "detail": CHANGES_COMPACTED_EXCEPTION_MESSAGE,
+                    "last_seq": obj.changes_compacted_seq,
+                },
+                status=status.HTTP_410_GONE,
+            )
+        model = get_dynamic_model(obj.name)
+        with observe_query(
+            obj.name, "changes", lambda: explain_queryset(changes_page(obj, since, limit))
+        ):
+            changes, has_more = read_changes(model, obj, since, limit)
+        serializer = create_serializer(obj.name)()
+        with timer("serializer"):
+            results = [
+                {
+                    "seq": change.seq,
+                    "operation": change.operation,
+                    "row_id": change.row_id,
+                    "created": change.created,
+                    "row": serializer.to_representation(row) if row is not None else None,
+                }
+                for change, row in changes
+            ]
+        ROWS_READ.labels("changes").inc(len(results))
+
+        return Response(
+            {
+                "last_seq": results[-1]["seq"] if results else since,
+                "has_more": has_more,
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=["get"], detail=True)
+    def stats(self, request: Request, pk=None) -> Response:
+        """Estimated row count, on-disk size and maintenance times, cached briefly"""
+        obj = self.get_object()
+        key = f"tablebuilder:stats:{obj.pk}"
+        stats = cache.get(key)
+        if stats is None:
+            stats = table_stats(get_dynamic_model(obj.name))
+            cache.set(key, stats, settings.TABLEBUILDER_STATS_CACHE_SECONDS)
 
-        return Response(serialized.data, status=status.HTTP_200_OK)
+        return Response(stats, status=status.HTTP_200_OK)
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+# Each request runs its sync code on a thread of its own, persistent connections would pile up
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
+
+# Warm the dynamic tables once the app registry is ready (TABLEBUILDER_STARTUP_MODE="eager")
+from main.apps.tablebuilder.helpers import warm_tables_on_server_start  # noqa: E402
+
+warm_tables_on_server_start()
@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
+
+import django
 import environ
 
 # Read from .env file
@@ -59,6 +62,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "main.apps.tablebuilder.middleware.QueryInstrumentationMiddleware",
 ]
 
 ROOT_URLCONF = "main.urls"
@@ -79,7 +83,8 @@ TEMPLATES = [
     },
 ]
 
-WSGI_APPLICATION = None
+WSGI_APPLICATION = "main.wsgi.application"
+ASGI_APPLICATION = "main.asgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -89,7 +94,10 @@ DATABASES = {
     #     "ENGINE": "django.db.backends.sqlite3",
     #     "NAME": BASE_DIR / "db.sqlite3",
     # }
-    "default": {
+    # DATABASE_URL (e.g. sqlite:////tmp/bench.sqlite3) overrides the DB_* variables
+    "default": env.db("DATABASE_URL")
+    if "DATABASE_URL" in env
+    else {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": env("DB_NAME"),
         "USER": env("DB_USER"),
@@ -98,6 +106,24 @@ DATABASES = {
         "PORT": env("DB_PORT"),
     }
 }
+# Persistent connections: reuse a connection for this many seconds (0 closes it after
+# every request, None keeps it open forever) and check it is alive before reuse. main.asgi
+# defaults it to 0: ASGI runs each request on a new thread, whose connection is never reused.
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool("DB_CONN_HEALTH_CHECKS", default=True)
+
+# Connection pooling (psycopg3 pool, Django >= 5.1 with psycopg_pool installed).
+# The pool replaces persistent connections, Django requires CONN_MAX_AGE = 0 with it.
+DB_POOL = env.bool("DB_POOL", default=False)
+if DB_POOL and django.VERSION >= (5, 1) and find_spec("psycopg_pool"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+            "timeout": env.int("DB_POOL_TIMEOUT", default=10),
+        }
+    }
 
 
 # Password validation
@@ -139,6 +165,65 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Table Builder
+# When to register the dynamic models and create their tables: "eager" when the WSGI/ASGI
+# application loads, "lazy" on the first request, "off" only through `manage.py warm_tables`
+TABLEBUILDER_STARTUP_MODE = env.str("TABLEBUILDER_STARTUP_MODE", default="eager")
+# Report per-request query count and timings in X-* response headers
+TABLEBUILDER_INSTRUMENTATION = env.bool("TABLEBUILDER_INSTRUMENTATION", default=True)
+# Log requests slower than this (in milliseconds) with their SQL, 0 disables
+TABLEBUILDER_SLOW_REQUEST_MS = env.float("TABLEBUILDER_SLOW_REQUEST_MS", default=0)
+# Path of the compiled schema snapshot loaded on startup, unset reads the schema from the db
+TABLEBUILDER_SCHEMA_SNAPSHOT = env.str("TABLEBUILDER_SCHEMA_SNAPSHOT", default=None)
+# Text search configuration of the PostgreSQL full-text index ("simple" does no stemming)
+TABLEBUILDER_SEARCH_CONFIG = env.str("TABLEBUILDER_SEARCH_CONFIG", default="simple")
+# Days the change feed keeps row changes, see the compact_row_changes command
+TABLEBUILDER_CHANGE_RETENTION_DAYS = env.int("TABLEBUILDER_CHANGE_RETENTION_DAYS", default=7)
+# Seconds the `stats` action caches a table's size and row estimate (in the default cache)
+TABLEBUILDER_STATS_CACHE_SECONDS = env.int("TABLEBUILDER_STATS_CACHE_SECONDS", default=60)
+# Seconds a schema change waits for the lock of its table (and, on PostgreSQL, for the locks its
+# DDL needs) before failing with 409, and the statement timeout of its DDL, 0 disables
+TABLEBUILDER_DDL_LOCK_TIMEOUT = env.float("TABLEBUILDER_DDL_LOCK_TIMEOUT", default=5)
+TABLEBUILDER_DDL_STATEMENT_TIMEOUT = env.float("TABLEBUILDER_DDL_STATEMENT_TIMEOUT", default=60)
+# Tables estimated above this many rows are dropped in the background on destroy/truncate, see
+# the process_db_jobs command
+TABLEBUILDER_TEARDOWN_ASYNC_ROWS = env.int("TABLEBUILDER_TEARDOWN_ASYNC_ROWS", default=100000)
+# Directory of the chunk files written by the archive_rows command
+TABLEBUILDER_ARCHIVE_DIR = env.str("TABLEBUILDER_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+# Requests of one ASGI process that may hold a database connection at once in the async row
+# endpoints, keep workers times this below the server's max_connections
+TABLEBUILDER_ASYNC_DB_CONNECTIONS = env.int("TABLEBUILDER_ASYNC_DB_CONNECTIONS", default=20)
+# Log dynamic-table reads slower than this (in milliseconds) with their plan, 0 disables
+TABLEBUILDER_SLOW_QUERY_MS = env.float("TABLEBUILDER_SLOW_QUERY_MS", default=500)
+# Run `?explain=true` plans with ANALYZE (executing the query) for every user, not only staff
+TABLEBUILDER_EXPLAIN_ANALYZE = env.bool("TABLEBUILDER_EXPLAIN_ANALYZE", default=False)
+# File of the slow-query log, rotated at 10MB with 5 backups
+TABLEBUILDER_SLOW_QUERY_LOG = env.str(
+    "TABLEBUILDER_SLOW_QUERY_LOG", default=str(BASE_DIR / "slow_queries.log")
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": TABLEBUILDER_SLOW_QUERY_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            # Only create the file once something is logged
+            "delay": True,
+            "formatter": "timestamped",
+        },
+    },
+    "formatters": {
+        "timestamped": {"format": "%(asctime)s %(levelname)s %(message)s"},
+    },
+    "loggers": {
+        "main.apps.tablebuilder.querylog": {"handlers": ["slow_queries"], "level": "WARNING"},
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
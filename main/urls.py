@@ -2,13 +2,11 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import RedirectView
 
-from main.apps.tablebuilder.helpers import generate_tables_on_startup, reload_app_models
+from main.apps.tablebuilder.views import metrics
 
 urlpatterns = [
     path("", RedirectView.as_view(url="/api/")),
     path("admin/", admin.site.urls),
     path("api/", include("main.apps.tablebuilder.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
-
-# generate tables if any
-generate_tables_on_startup()
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
 
 application = get_wsgi_application()
+
+# Warm the dynamic tables once the app registry is ready (TABLEBUILDER_STARTUP_MODE="eager")
+from main.apps.tablebuilder.helpers import warm_tables_on_server_start  # noqa: E402
+
+warm_tables_on_server_start()